@@ -0,0 +1,176 @@
+# ==========================
+#     SYNTHETIC CORPUS
+# ==========================
+"""
+Gera .lng sintéticos válidos dos três jogos para benchmark.
+
+Parâmetros comuns:
+    entries  número de entradas
+    length   tamanho médio dos textos (caracteres)
+    mix      pesos por codificação, ex. {"cp1252": 0.7, "utf16": 0.2, "utf8": 0.1}.
+             OB1 usa cp1252/utf16, OB2 cp1252/utf8 e Final Exam só utf8;
+             as codificações que o jogo não tem são ignoradas.
+    dup      fração das entradas que repetem o texto de uma entrada anterior
+    seed     semente do random (mesmos parâmetros -> mesmo arquivo)
+"""
+import random
+import struct
+
+from games.final_exam import OFFSET_MASK, TAG_SHIFT
+from games.obscure1 import OB1_BUTTON_TAGS
+
+DEFAULT_MIX = {"cp1252": 0.7, "utf16": 0.15, "utf8": 0.15}
+
+# palavras que cabem em cp1252 (acentos do português/francês/alemão)
+WORDS_CP1252 = [
+    "the", "door", "is", "locked", "you", "need", "a", "key", "Kenny", "Shannon",
+    "école", "gymnase", "über", "Schlüssel", "coração", "não", "está", "aquí",
+    "fenêtre", "œuvre", "Straße", "déjà", "façade", "naïve", "zoë", "¿qué?",
+]
+
+# fora do cp1252: só aparecem nos textos UTF-16/UTF-8
+WORDS_WIDE = ["☃", "Łódź", "ő", "ключ", "дверь", "鍵", "扉", "€uro", "ğ", "Ω"]
+
+GLYPHS = [src for src, tag in OB1_BUTTON_TAGS if len(src) == 1]
+
+
+def _pick_encoding(r, mix, allowed):
+    weights = [mix.get(enc, 0) for enc in allowed]
+    if not any(weights):
+        return allowed[0]
+    return r.choices(allowed, weights)[0]
+
+
+def _make_text(r, length, wide=False, glyphs=False):
+    words = WORDS_CP1252 + WORDS_WIDE if wide else WORDS_CP1252
+    out = [r.choice(words)]
+    size = len(out[0])
+    target = max(1, int(r.gauss(length, length / 4)))
+
+    while size < target:
+        word = r.choice(GLYPHS) if glyphs and r.random() < 0.05 else r.choice(words)
+
+        # de vez em quando uma quebra de linha no meio do texto
+        out.append("\n" if r.random() < 0.02 else " ")
+        out.append(word)
+        size += len(word) + 1
+
+    return "".join(out)
+
+
+def _texts(r, entries, length, mix, dup, allowed, glyphs=False):
+    """
+    Gera (codificação, texto) por entrada; dup repete entradas anteriores.
+    """
+    made = []
+
+    for i in range(entries):
+        if made and r.random() < dup:
+            made.append(r.choice(made))
+            continue
+
+        enc = _pick_encoding(r, mix, allowed)
+        text = _make_text(r, length, wide=enc != "cp1252", glyphs=glyphs and enc == "cp1252")
+        made.append((enc, text))
+
+    return made
+
+
+# ==========================
+#         OBSCURE 1
+# ==========================
+def gen_ob1(path, entries=1000, length=40, mix=None, dup=0.1, seed=1):
+    if not 1 <= entries <= 200000:
+        raise ValueError("OB1 entry count must be 1..200000 (detect limit)")
+
+    r = random.Random(seed)
+    out = [struct.pack(">II", 0, entries)]
+
+    for i, (enc, text) in enumerate(_texts(r, entries, length, mix or DEFAULT_MIX, dup,
+                                            ["cp1252", "utf16"], glyphs=True)):
+        group, eid = divmod(i, 50)
+
+        if enc == "utf16":
+            body = text.encode("utf-16-le") + b"\x00\x00"
+            out.append(struct.pack(">HHIBB", group & 0xFFFF, eid, len(body) + 2, 1, r.randrange(8)))
+        else:
+            body = text.encode("cp1252") + b"\x00"
+            out.append(struct.pack(">HHIB", group & 0xFFFF, eid, len(body) + 1, 0))
+
+        out.append(body)
+
+    with open(path, "wb") as f:
+        f.write(b"".join(out))
+
+
+# ==========================
+#         OBSCURE 2
+# ==========================
+def gen_ob2(path, entries=1000, length=40, mix=None, dup=0.1, seed=1, per_group=50):
+    r = random.Random(seed)
+    texts = _texts(r, entries, length, mix or DEFAULT_MIX, dup, ["cp1252", "utf8"])
+    groups = [texts[i:i + per_group] for i in range(0, entries, per_group)]
+
+    out = [struct.pack("<II", 1, len(groups))]
+
+    for g, group in enumerate(groups):
+        out.append(struct.pack("<II", 100 + g, len(group)))
+
+        for e, (enc, text) in enumerate(group):
+            raw = text.encode("utf-8" if enc == "utf8" else "cp1252")
+            out.append(struct.pack("<II", e * 3, len(raw)))
+            out.append(raw)
+
+    with open(path, "wb") as f:
+        f.write(b"".join(out))
+
+
+# ==========================
+#        FINAL EXAM
+# ==========================
+def gen_final_exam(path, entries=1000, length=40, mix=None, dup=0.1, seed=1):
+    """
+    1 a 3 subs por entrada. Textos repetidos dividem o offset no pool; o pool
+    tem que caber nos 17 bits de offset, então length x entries é limitado.
+    """
+    r = random.Random(seed)
+    counts = [1 + r.randrange(3) for _ in range(entries)]
+    texts = _texts(r, sum(counts), length, {"utf8": 1}, dup, ["utf8"])
+
+    pool = bytearray()
+    where = {}
+    table = []
+    k = 0
+
+    for i, n in enumerate(counts):
+        table.append(struct.pack("<II", 0x1000 + i, n))
+
+        for tag in range(1, n + 1):
+            raw = texts[k][1].encode("utf-8")
+            k += 1
+
+            offset = where.get(raw)
+            if offset is None:
+                offset = where[raw] = len(pool)
+                pool += raw + b"\x00"
+
+            table.append(struct.pack("<II", (tag << TAG_SHIFT) | offset, 0))
+
+    if len(pool) > OFFSET_MASK:
+        raise ValueError(f"Final Exam pool of {len(pool)} bytes exceeds the 17-bit offset limit")
+
+    glyphs = sorted({ord(c) for t in set(where) for c in t.decode("utf-8")})
+
+    with open(path, "wb") as f:
+        f.write(struct.pack("<5I", 1, 0x01000000, sum(counts), entries, len(glyphs)))
+        f.write(struct.pack(f"<{len(glyphs)}I", *glyphs))
+        f.write(b"".join(table))
+        f.write(struct.pack("<I", len(pool)))
+        f.write(pool)
+
+
+GENERATORS = {
+    "ob1": gen_ob1,
+    "ob2": gen_ob2,
+    "finalexam": gen_final_exam,
+}
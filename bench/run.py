@@ -0,0 +1,244 @@
+# ==========================
+#         BENCHMARK
+# ==========================
+"""
+Round trip completo (extract -> export TXT/CSV/JSONL -> parse -> rebuild)
+em corpora sintéticos de vários tamanhos. Cada etapa é medida duas vezes:
+uma só com o relógio e outra com tracemalloc (pico de memória), porque o
+tracemalloc deixa o código bem mais lento.
+
+    python -m bench                          # escalas padrão, bench_results.json
+    python -m bench --scales 1000,50000 --games ob1,ob2
+    python -m bench --compare old.json       # exit 1 se alguma etapa piorou
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from core import __version__
+from core.batch import rebuild_data
+from core.csv import export_csv, parse_csv
+from core.jsonl import export_jsonl, parse_jsonl
+from core.txt import export_txt, parse_txt
+from games.final_exam import OFFSET_MASK, extract_final_exam
+from games.obscure1 import extract_ob1
+from games.obscure2 import extract_ob2
+
+from bench.corpus import DEFAULT_MIX, GENERATORS
+
+EXTRACTORS = {
+    "ob1": extract_ob1,
+    "ob2": extract_ob2,
+    "finalexam": extract_final_exam,
+}
+
+DEFAULT_SCALES = [1000, 10000, 100000]
+
+
+def max_entries(game, length):
+    # o pool do Final Exam tem offsets de 17 bits: ~2 subs por entrada,
+    # UTF-8 com folga para os caracteres de vários bytes
+    if game == "finalexam":
+        return int(OFFSET_MASK / (2.5 * (length * 1.3 + 2)))
+    if game == "ob1":
+        return 200000
+    return None
+
+
+def _stages(game, workdir):
+    """
+    Etapas do round trip, em ordem. Cada uma recebe o estado (dict) e
+    devolve quantas entradas processou.
+    """
+    lng = os.path.join(workdir, f"{game}.lng")
+    txt = os.path.join(workdir, f"{game}.txt")
+    csv = os.path.join(workdir, f"{game}.csv")
+    jsonl = os.path.join(workdir, f"{game}.jsonl")
+    out = os.path.join(workdir, f"{game}.new.lng")
+
+    def extract(state):
+        state["data"] = EXTRACTORS[game](lng)
+        return len(state["data"]["entries"])
+
+    def export_txt_stage(state):
+        export_txt(state["data"], txt)
+        return len(state["data"]["entries"])
+
+    def export_csv_stage(state):
+        export_csv(state["data"], csv)
+        return len(state["data"]["entries"])
+
+    def export_jsonl_stage(state):
+        export_jsonl(state["data"], jsonl)
+        return len(state["data"]["entries"])
+
+    def parse_txt_stage(state):
+        with open(txt, encoding="utf-8-sig") as f:
+            state["parsed"] = parse_txt(f.read())
+        return len(state["parsed"]["entries"])
+
+    def parse_csv_stage(state):
+        return len(parse_csv(csv)["entries"])
+
+    def parse_jsonl_stage(state):
+        return len(parse_jsonl(jsonl)["entries"])
+
+    def rebuild(state):
+        rebuild_data(state["parsed"], out)
+        return len(state["parsed"]["entries"])
+
+    return [
+        ("extract", extract),
+        ("export_txt", export_txt_stage),
+        ("export_csv", export_csv_stage),
+        ("export_jsonl", export_jsonl_stage),
+        ("parse_txt", parse_txt_stage),
+        ("parse_csv", parse_csv_stage),
+        ("parse_jsonl", parse_jsonl_stage),
+        ("rebuild", rebuild),
+    ]
+
+
+def run_case(game, entries, length, mix, dup, memory=True, seed=1, repeat=1):
+    with tempfile.TemporaryDirectory(prefix="lngbench-") as workdir:
+        lng = os.path.join(workdir, f"{game}.lng")
+        GENERATORS[game](lng, entries=entries, length=length, mix=mix, dup=dup, seed=seed)
+
+        result = {
+            "game": game,
+            "entries": entries,
+            "length": length,
+            "mix": mix,
+            "dup": dup,
+            "file_size": os.path.getsize(lng),
+            "stages": {},
+        }
+
+        stages = _stages(game, workdir)
+
+        # melhor tempo de repeat passadas (menos ruído para o --compare)
+        best = {}
+        for _ in range(repeat):
+            state = {}
+            for name, stage in stages:
+                t = time.perf_counter()
+                count = stage(state)
+                seconds = time.perf_counter() - t
+                best[name] = min(best.get(name, (seconds, count)), (seconds, count))
+
+        for name, (seconds, count) in best.items():
+            result["stages"][name] = {
+                "seconds": round(seconds, 4),
+                "entries_per_s": round(count / seconds) if seconds else None,
+            }
+
+        if memory:
+            state = {}
+            for name, stage in stages:
+                tracemalloc.start()
+                stage(state)
+                result["stages"][name]["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+        result["total_seconds"] = round(sum(s["seconds"] for s in result["stages"].values()), 4)
+
+    return result
+
+
+def compare(results, previous, tolerance):
+    """
+    Devolve as linhas das etapas que ficaram mais lentas que previous
+    além da tolerância (0.2 = 20%).
+    """
+    old = {
+        (r["game"], r["entries"], r["length"], r["dup"]): r
+        for r in previous.get("results", [])
+    }
+    slower = []
+
+    for r in results:
+        before = old.get((r["game"], r["entries"], r["length"], r["dup"]))
+        if before is None:
+            continue
+
+        for name, stage in r["stages"].items():
+            prev = before["stages"].get(name)
+            # etapas muito curtas são só ruído
+            if not prev or prev["seconds"] < 0.01:
+                continue
+
+            ratio = stage["seconds"] / prev["seconds"]
+            if ratio > 1 + tolerance:
+                slower.append(
+                    f"{r['game']} {r['entries']}: {name} {prev['seconds']:.3f}s -> "
+                    f"{stage['seconds']:.3f}s (+{(ratio - 1) * 100:.0f}%)"
+                )
+
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="LNG tool round-trip benchmark")
+    parser.add_argument("--games", default="ob1,ob2,finalexam")
+    parser.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES),
+                        help="entry counts, comma separated (capped per game: OB1 200000, Final Exam by its pool size)")
+    parser.add_argument("--length", type=int, default=40, help="average string length")
+    parser.add_argument("--mix", default=",".join(f"{k}={v}" for k, v in DEFAULT_MIX.items()),
+                        help="encoding weights, e.g. cp1252=0.7,utf16=0.15,utf8=0.15")
+    parser.add_argument("--dup", type=float, default=0.1, help="fraction of duplicated strings")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3, help="timing passes per case (best one is kept)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--compare", metavar="OLD_JSON", help="fail if a stage got slower than in OLD_JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    mix = {}
+    for item in args.mix.split(","):
+        k, v = item.split("=", 1)
+        mix[k.strip()] = float(v)
+
+    results = []
+
+    for game in args.games.split(","):
+        cap = max_entries(game, args.length)
+        scales = sorted({min(int(s), cap or int(s)) for s in args.scales.split(",")})
+
+        for entries in scales:
+            r = run_case(game, entries, args.length, mix, args.dup, not args.no_memory, args.seed, args.repeat)
+            results.append(r)
+
+            print(f"{game:9} {entries:>7} entries  {r['file_size'] / 1e6:7.2f} MB  {r['total_seconds']:7.2f}s")
+            for name, stage in r["stages"].items():
+                peak = stage.get("peak_bytes")
+                peak = f"{peak / 1e6:8.1f} MB" if peak is not None else ""
+                print(f"    {name:11} {stage['seconds']:8.3f}s {stage['entries_per_s'] or 0:>10} entries/s {peak}")
+
+    report = {
+        "tool_version": __version__,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\nresults → {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            slower = compare(results, json.load(f), args.tolerance)
+
+        for line in slower:
+            print(f"[SLOWER] {line}")
+
+        if slower:
+            sys.exit(1)
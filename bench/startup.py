@@ -0,0 +1,119 @@
+# ==========================
+#      STARTUP BENCHMARK
+# ==========================
+"""
+Tempo de partida da CLI: roda detect/extract/rebuild num arquivo pequeno
+com "python -X importtime" e mede o tempo total do processo e o tempo
+gasto importando módulos (soma do "self" de cada import).
+
+    python -m bench.startup                      # startup_results.json
+    python -m bench.startup --tool old/obscure_lng_tool.py -o old.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench.corpus import GENERATORS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _commands(workdir):
+    lng = os.path.join(workdir, "small.lng")
+    txt = os.path.join(workdir, "small.txt")
+    out = os.path.join(workdir, "small.new.lng")
+
+    return [
+        ("detect", ["detect", lng]),
+        ("extract", ["extract", lng, "--no-cache"]),
+        ("rebuild", ["rebuild", txt, "-o", out]),
+    ]
+
+
+def parse_importtime(stderr):
+    """
+    Devolve (microssegundos importando, módulos, [(self_us, módulo)] mais lentos).
+    """
+    total = 0
+    modules = []
+
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # cabeçalho
+
+        own = int(fields[0])
+        total += own
+        modules.append((own, fields[2].strip()))
+
+    return total, len(modules), sorted(modules, reverse=True)[:5]
+
+
+def run_command(tool, args, repeat):
+    best = None
+
+    for _ in range(repeat):
+        t = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", tool] + args,
+            capture_output=True, text=True, cwd=ROOT,
+        )
+        wall = time.perf_counter() - t
+
+        if proc.returncode != 0:
+            raise RuntimeError(f"{' '.join(args)} failed:\n{proc.stdout}{proc.stderr}")
+
+        imports, count, slowest = parse_importtime(proc.stderr)
+        if best is None or wall < best["wall_seconds"]:
+            best = {
+                "wall_seconds": round(wall, 4),
+                "import_seconds": round(imports / 1e6, 4),
+                "modules": count,
+                "slowest": [f"{name} {us / 1000:.1f}ms" for us, name in slowest],
+            }
+
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.startup", description="LNG tool CLI startup benchmark")
+    parser.add_argument("--tool", default=os.path.join(ROOT, "obscure_lng_tool.py"))
+    parser.add_argument("--game", default="ob1", choices=sorted(GENERATORS))
+    parser.add_argument("--repeat", type=int, default=5, help="runs per command (fastest one is kept)")
+    parser.add_argument("-o", "--output", default="startup_results.json")
+    args = parser.parse_args(argv)
+
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix="lngstartup-") as workdir:
+        GENERATORS[args.game](os.path.join(workdir, "small.lng"), entries=20)
+
+        for name, cmd in _commands(workdir):
+            results[name] = r = run_command(args.tool, cmd, args.repeat)
+            print(f"{name:8} {r['wall_seconds'] * 1000:7.1f} ms total  "
+                  f"{r['import_seconds'] * 1000:7.1f} ms imports ({r['modules']} modules)")
+            for item in r["slowest"]:
+                print(f"    {item}")
+
+    report = {
+        "tool": args.tool,
+        "python": sys.version.split()[0],
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\nresults → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# ==========================
+#     OB1 BUTTON TAGS
+# ==========================
+"""
+Tags de botão do Obscure 1: confere o round trip em textos aleatórios e
+mede a vazão do apply (extract) e do reverse (rebuild).
+
+Propriedades, para cada tabela de OB1_TAG_TABLES:
+    reverse(apply(x)) == x   x: texto do jogo (glifos, sem "[")
+    apply(reverse(t)) == t   t: texto do editor (tags, sem glifos)
+    extract(rebuild(t)) == t pelo .lng inteiro (cp1252 de verdade)
+
+    python -m bench.tags                     # exit 1 se alguma falhar
+    python -m bench.tags --cases 20000 --entries 200000
+"""
+import argparse
+import random
+import sys
+import time
+
+from core.entries import Ob1Entry
+from games.obscure1 import (
+    DECODE_CHUNK,
+    OB1_TAG_TABLES,
+    extract_ob1,
+    get_ob1_tag_codec,
+    rebuild_ob1_bytes,
+)
+
+from bench.corpus import WORDS_CP1252
+
+# caracteres comuns do cp1252 que não são glifo de nenhuma tabela
+PLAIN = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 .,!?'\"-:;()\néèçãõüöß¿¡"
+
+
+def _game_text(r, glyphs):
+    alphabet = PLAIN + "".join(glyphs)
+    return "".join(r.choice(alphabet) for _ in range(r.randrange(40)))
+
+
+def _editor_text(r, tags, glyphs):
+    parts = []
+    for _ in range(r.randrange(12)):
+        if tags and r.random() < 0.3:
+            parts.append(r.choice(tags))
+        else:
+            parts.append(r.choice(WORDS_CP1252))
+        parts.append(r.choice(" \n"))
+
+    # texto do editor não tem glifos (o extract já trocou todos)
+    return "".join(c for c in "".join(parts) if c not in glyphs)
+
+
+def check(table, cases, seed):
+    """
+    Devolve a lista de falhas (mensagens) de uma tabela.
+    """
+    pairs = OB1_TAG_TABLES[table]
+    apply, reverse = get_ob1_tag_codec(table)
+    glyphs = {src for src, _ in pairs}
+    tags = [tag for _, tag in pairs]
+    r = random.Random(seed)
+    failures = []
+
+    for _ in range(cases):
+        text = _game_text(r, glyphs)
+        if reverse(apply(text)) != text:
+            failures.append(f"{table}: reverse(apply({text!r})) = {reverse(apply(text))!r}")
+
+        text = _editor_text(r, tags, glyphs)
+        if apply(reverse(text)) != text:
+            failures.append(f"{table}: apply(reverse({text!r})) = {apply(reverse(text))!r}")
+
+    texts = [_editor_text(r, tags, glyphs) for _ in range(cases)]
+    entries = [Ob1Entry(i, 0, i & 0xFFFF, 0, 0, text) for i, text in enumerate(texts)]
+    back = extract_ob1(rebuild_ob1_bytes({"tags": table}, entries), tags=table)["entries"]
+
+    for e, text in zip(back, texts):
+        if e.text != text:
+            failures.append(f"{table}: .lng round trip {text!r} -> {e.text!r}")
+
+    return failures[:10]
+
+
+def throughput(entries, seed):
+    """
+    Entradas/s do apply e do reverse (tabela ps2): texto sem tags e com ~2
+    tags por entrada, por entrada e por bloco (como no extract).
+    """
+    apply, reverse = get_ob1_tag_codec("ps2")
+    pairs = OB1_TAG_TABLES["ps2"]
+    r = random.Random(seed)
+
+    plain = [" ".join(r.choice(WORDS_CP1252) for _ in range(8)) for _ in range(entries)]
+    tagged = [f"{text} {r.choice(pairs)[1]} {r.choice(pairs)[1]}" for text in plain]
+    glyphs = [reverse(text) for text in tagged]
+
+    def rate(fn, texts):
+        t = time.perf_counter()
+        for text in texts:
+            fn(text)
+        return len(texts) / (time.perf_counter() - t)
+
+    def block_rate(texts):
+        blocks = ["\x00".join(texts[i:i + DECODE_CHUNK]) for i in range(0, len(texts), DECODE_CHUNK)]
+        t = time.perf_counter()
+        for block in blocks:
+            apply(block)
+        return len(texts) / (time.perf_counter() - t)
+
+    return {
+        "apply plain": rate(apply, plain),
+        "apply tagged": rate(apply, glyphs),
+        "apply block tagged": block_rate(glyphs),
+        "reverse plain": rate(reverse, plain),
+        "reverse tagged": rate(reverse, tagged),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.tags", description="OB1 button tag round trip and throughput")
+    parser.add_argument("--cases", type=int, default=5000, help="random texts per table")
+    parser.add_argument("--entries", type=int, default=100000, help="entries for the throughput run")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    failures = []
+    for table in OB1_TAG_TABLES:
+        found = check(table, args.cases, args.seed)
+        print(f"{table:6} {'ok' if not found else f'{len(found)} failures'}")
+        failures += found
+
+    for line in failures:
+        print(f"    {line}")
+
+    for name, value in throughput(args.entries, args.seed).items():
+        print(f"{name:20} {value:12,.0f} entries/s")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# ==========================
+#     ROUND-TRIP CORPORA
+# ==========================
+"""
+lngtool verify nos corpora sintéticos de cada jogo, com e sem textos
+repetidos (no Final Exam, repetidos dividem o offset no pool). Exit 1 se
+algum não voltar igual.
+
+    python -m bench.verify
+    python -m bench.verify --entries 5000 --games finalexam
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from core.verify import verify_file
+
+from bench.corpus import GENERATORS
+
+# fração de textos repetidos: sem, a do bench e bem mais que a do bench
+DUPS = (0.0, 0.1, 0.5)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m bench.verify")
+    ap.add_argument("--entries", type=int, default=1000)
+    ap.add_argument("--games", default=",".join(GENERATORS))
+    ap.add_argument("--seeds", type=int, default=3, help="corpora per game and dup ratio")
+    args = ap.parse_args(argv)
+
+    failed = 0
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for game in args.games.split(","):
+            for dup in DUPS:
+                for seed in range(1, args.seeds + 1):
+                    path = os.path.join(workdir, f"{game}-{dup}-{seed}.lng")
+                    GENERATORS[game](path, args.entries, dup=dup, seed=seed)
+
+                    try:
+                        verify_file(path)
+                    except Exception as e:
+                        failed += 1
+                        print(f"[FAIL] {game} dup={dup} seed={seed}: {e}")
+                    else:
+                        print(f"[OK] {game} dup={dup} seed={seed}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# ==========================
+#        LIBRARY API
+# ==========================
+"""
+Extract e rebuild sem passar pelo disco, para usar o tool como biblioteca
+(ex.: um serviço que recebe os .lng por uma fila). A CLI usa estas mesmas
+funções e só lê e grava os arquivos.
+
+    from core.api import extract, rebuild
+
+    data = extract(blob)                    # bytes, bytearray, memoryview,
+                                            # arquivo binário aberto ou caminho
+    data["entries"][0].text = "..."
+    new = rebuild(data)                     # bytearray com o .lng
+    new = rebuild(data, base=blob)          # patch: só as entradas editadas
+    rebuild(data, out=f)                    # grava num arquivo/stream aberto
+    rebuild(data, out=buf)                  # bytearray ou buffer já alocado
+
+TXT e CSV em memória: read_txt/read_csv e txt_entry_writer/csv_entry_writer
+já aceitam qualquer arquivo de texto (ex.: io.StringIO).
+"""
+from core.detect import best_game, sniff, sniff_data
+from core.reader import is_path, read_lng
+from games import ALIASES, get_handler
+
+
+def _load(source):
+    # caminho fica caminho (mmap no Final Exam); o resto vira bytes uma
+    # vez só, porque detect e extract leem o mesmo conteúdo
+    return source if is_path(source) else read_lng(source)
+
+
+def _detect(source):
+    return best_game(sniff(source) if is_path(source) else sniff_data(source))
+
+
+def detect(source):
+    """
+    "ob1", "ob2", "finalexam" ou "unknown". Um arquivo aberto é lido até o fim.
+    """
+    return _detect(_load(source))
+
+
+def stream(source, game=None, tags="ps2"):
+    """
+    Como extract, mas "entries" é um gerador. game: pula a detecção.
+    """
+    source = _load(source)
+
+    if game is None:
+        game = _detect(source)
+        if game == "unknown":
+            raise ValueError(f"Detect failed. Game = {game}")
+
+    game = ALIASES.get(game, game)
+    handler = get_handler(game, "stream")
+
+    return handler(source, tags=tags) if game == "ob1" else handler(source)
+
+
+def extract(source, game=None, tags="ps2"):
+    """
+    Lê um .lng (caminho, bytes/bytearray/memoryview ou arquivo binário
+    aberto) e devolve o dict do jogo com a lista de entradas.
+    tags: tabela de botões do Obscure 1.
+    """
+    data = stream(source, game, tags)
+    data["entries"] = list(data["entries"])
+    return data
+
+
+def rebuild(data, out=None, base=None, optimize_pool=False, tags=None, stats=None, extend_glyphs=False,
+            dedup_pool=False):
+    """
+    Monta o .lng de data ({"game", "header", "entries"}, como vem do
+    read_txt/read_csv, ou o próprio dict do extract com as entradas
+    editadas: sem "header", os campos são lidos do topo do dict).
+
+    base: .lng original (caminho, bytes/buffer ou arquivo aberto); se dado,
+    só as entradas alteradas são codificadas (patch).
+    out: None devolve o .lng (bytearray/bytes). Senão devolve o número de
+    bytes escritos em out: arquivo/stream (write), bytearray (conteúdo
+    trocado, o objeto é reaproveitado) ou outro buffer gravável de tamanho
+    fixo (escrito a partir do início; ValueError se não couber).
+    stats (dict opcional) recebe os números do rebuild/patch (no Final
+    Exam também "missing_glyphs": [(sid, caracteres)] fora da tabela de glifos).
+    extend_glyphs: Final Exam, acrescenta esses caracteres à tabela.
+    dedup_pool: Final Exam sem base, textos iguais dividem o offset no pool.
+    """
+    header = data.get("header", data)
+    entries = data.get("entries", [])
+    game = data.get("game", "").lower()
+    game = ALIASES.get(game, game)
+
+    if stats is None:
+        stats = {}
+
+    if base is not None:
+        base = _load(base)
+        if _detect(base) != game:
+            name = base if is_path(base) else "buffer"
+            raise ValueError(f"--base {name} is not a {game} file")
+
+    options = {}
+    if game == "ob1":
+        options["tags"] = tags
+    if game == "finalexam" or base is not None:
+        options["stats"] = stats
+    if game == "finalexam":
+        options["extend_glyphs"] = extend_glyphs
+    if game == "finalexam" and base is None:
+        options["optimize_pool"] = optimize_pool
+        options["dedup_pool"] = dedup_pool
+
+    if base is not None:
+        result = get_handler(game, "patch_bytes")(header, entries, base, **options)
+    else:
+        result = get_handler(game, "rebuild_bytes")(header, entries, **options)
+
+    return result if out is None else write_into(out, result)
+
+
+def write_into(out, data):
+    """
+    Escreve data em out (arquivo/stream, bytearray ou buffer gravável) e
+    devolve o número de bytes.
+    """
+    if hasattr(out, "write"):
+        out.write(data)
+        return len(data)
+
+    if isinstance(out, bytearray):
+        out[:] = data
+        return len(data)
+
+    with memoryview(out) as view, view.cast("B") as flat:
+        if flat.readonly:
+            raise TypeError("out is a read-only buffer")
+        if len(flat) < len(data):
+            raise ValueError(f"out buffer too small: {len(data)} bytes needed, {len(flat)} available")
+
+        flat[:len(data)] = data
+
+    return len(data)
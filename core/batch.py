@@ -0,0 +1,443 @@
+import io
+import itertools
+import os
+from contextlib import ExitStack
+
+from core import api, profile
+from core.layout import open_atomic, write_atomic
+from games import ALIASES
+from core.txt import NotSourceError, read_txt, txt_entry_writer
+
+# formato -> (extensão, opções do open). O core.csv e o core.jsonl (e o
+# csv/json da stdlib) só são importados para o formato pedido, e o
+# core.archive (zipfile) só quando aparece um .zip
+EXPORTS = {
+    "txt": (".txt", {"encoding": "utf-8", "newline": "\n"}),
+    "csv": (".csv", {"encoding": "utf-8-sig", "newline": ""}),
+    "jsonl": (".jsonl", {"encoding": "utf-8", "newline": "\n"}),
+}
+
+
+def _entry_writer(fmt):
+    if fmt == "csv":
+        from core.csv import csv_entry_writer
+        return csv_entry_writer
+
+    if fmt == "jsonl":
+        from core.jsonl import jsonl_entry_writer
+        return jsonl_entry_writer
+
+    return txt_entry_writer
+
+
+def _split_member(path):
+    # split_member sem importar o core.archive quando não há .zip no caminho
+    if ".zip" not in path.lower():
+        return None
+
+    from core.archive import split_member
+    return split_member(path)
+
+
+def _open_text(path, newline=None):
+    if _split_member(path):
+        from core.archive import open_text
+        return open_text(path, newline=newline)
+    return open(path, encoding="utf-8-sig", newline=newline)
+
+
+def input_root(paths):
+    """
+    Pasta comum dos arquivos de paths (membros de zip ficam de fora) ou None.
+    Saídas em -o PASTA ou -o saida.zip mantêm o caminho relativo a ela, então
+    "a.lng" e "sub/a.lng" não caem no mesmo arquivo.
+    """
+    dirs = [os.path.dirname(os.path.abspath(p)) for p in paths if not _split_member(p)]
+
+    try:
+        return os.path.commonpath(dirs) if dirs else None
+    except ValueError:
+        # Windows: arquivos em drives diferentes
+        return None
+
+
+def find_collision(paths, root):
+    """
+    Primeiro par de fontes que iriam para a mesma saída em -o PASTA ou no
+    zip de saída (ex.: "a.lng" e o membro "pacote.zip/a.lng"), ou None.
+    """
+    seen = {}
+
+    for path in paths:
+        key = _relative_name(path, root).rsplit(".", 1)[0].lower()
+        if key in seen:
+            return seen[key], path
+        seen[key] = path
+
+    return None
+
+
+# ==========================
+#        SINGLE FILE
+# ==========================
+def _relative_name(path, root):
+    # caminho "pasta/a.lng" da saída: o do zip de origem, o relativo a root
+    # ou, sem root, só o nome do arquivo
+    member = _split_member(path)
+    if member:
+        return member[1]
+    if root:
+        return os.path.relpath(os.path.abspath(path), root).replace(os.sep, "/")
+    return os.path.basename(path)
+
+
+def _output_base(path, output_dir, root=None):
+    member = _split_member(path)
+
+    if member and not output_dir:
+        # membro de um zip: pasta com o nome do zip ao lado dele
+        archive, name = member
+        base = os.path.join(os.path.splitext(archive)[0], *name.split("/")).rsplit(".", 1)[0]
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        return base
+
+    if not output_dir:
+        return path.rsplit(".", 1)[0]
+
+    base = os.path.join(output_dir, *_relative_name(path, root).split("/")).rsplit(".", 1)[0]
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    return base
+
+
+def _archive_name(path, ext, root=None):
+    # nome dentro do zip de saída (ver _relative_name)
+    return _relative_name(path, root).rsplit(".", 1)[0] + ext
+
+
+def _source(path):
+    # membro de zip -> bytes; arquivo continua caminho (mmap no Final Exam)
+    if _split_member(path):
+        from core.archive import read_member
+        return read_member(path)
+    return path
+
+
+def extract_file(path, fmt="txt", output=None, output_dir=None, tags="ps2", cache=None, archive=None, root=None):
+    """
+    cache: ExtractCache opcional. Num acerto os arquivos saem do cache e o
+    .lng não é lido de novo (só o hash).
+    archive: zip de saída. Nada é gravado; devolve (mensagens, [(nome no
+    zip, bytes)]) para o processo principal escrever no zip.
+    root: pasta das entradas (input_root); em output_dir e no zip a saída
+    mantém o caminho relativo a ela.
+    """
+    if archive:
+        from core.archive import member_path
+
+        targets = {fmt: _archive_name(path, EXPORTS[fmt][0], root) for fmt in _formats(fmt)}
+        files = {}
+        meta = _extract(path, targets, tags, files)
+        messages = _extract_messages(path, {fmt: member_path(archive, name) for fmt, name in targets.items()}, meta)
+        return messages, list(files.items())
+
+    base = _output_base(path, output_dir, root)
+    targets = {}
+
+    if fmt in ("txt", "both"):
+        targets["txt"] = output or base + ".txt"
+    if fmt in ("csv", "both"):
+        targets["csv"] = base + ".csv"
+    if fmt == "jsonl":
+        targets["jsonl"] = output or base + ".jsonl"
+
+    # o cache é por caminho (hash do arquivo): membros de zip ficam de fora
+    if _split_member(path):
+        cache = None
+
+    if cache is not None:
+        key = cache.key(path, fmt, tags)
+        meta = cache.load(key, targets)
+
+        if meta is not None:
+            return _extract_messages(path, targets, meta, " (cached)")
+
+    meta = _extract(path, targets, tags)
+
+    if cache is not None:
+        cache.store(key, targets, meta)
+
+    return _extract_messages(path, targets, meta)
+
+
+def _formats(fmt):
+    return ("txt", "csv") if fmt == "both" else (fmt,)
+
+
+def _extract(path, targets, tags, memory=None):
+    """
+    memory (dict opcional): as saídas vão para a memória, memory[alvo] = bytes.
+    """
+    # as entradas vêm de um gerador e vão direto para o(s) arquivo(s); só o
+    # módulo do jogo detectado é importado. Cada arquivo é escrito num
+    # temporário (open_atomic): um erro no meio não trunca a saída anterior
+    data = api.stream(_source(path), tags=tags)
+    buffers = []
+
+    # o tempo de ler/decodificar as entradas fica nas etapas de dentro
+    with profile.stage("export") as span, ExitStack() as files:
+        # uma passada só alimentando todos os formatos
+        writers = []
+        for fmt, target in targets.items():
+            _, options = EXPORTS[fmt]
+            writer = _entry_writer(fmt)
+
+            if memory is None:
+                f = files.enter_context(open_atomic(target, "w", **options))
+            else:
+                f = io.StringIO(newline=options["newline"])
+                buffers.append((target, f, options["encoding"]))
+
+            writers.append(writer(f, data))
+
+        if len(writers) == 1:
+            write_entry = writers[0]
+            for e in data["entries"]:
+                write_entry(e)
+        else:
+            for e in data["entries"]:
+                for write_entry in writers:
+                    write_entry(e)
+
+        span.entries = getattr(data["entries"], "count", 0)
+
+    for target, f, encoding in buffers:
+        memory[target] = f.getvalue().encode(encoding)
+
+    # Final Exam: offsets que caem fora do pool ou no meio de um caractere
+    # (a lista só fica completa depois que as entradas foram consumidas)
+    first = {}
+    total = {}
+    for index, tag, offset, kind in data.get("warnings", []):
+        if kind == "suffix":
+            continue
+        first.setdefault(kind, (index, tag, offset))
+        total[kind] = total.get(kind, 0) + 1
+
+    meta = {"warnings": [[kind, total[kind], index, tag, offset] for kind, (index, tag, offset) in first.items()]}
+
+    # Obscure 2: entradas lidas como cp1252 num arquivo com UTF-8
+    fallback = data.get("fallback")
+    if fallback:
+        meta["fallback"] = [len(fallback)] + list(fallback[0])
+
+    return meta
+
+
+def _extract_messages(path, targets, meta, note=""):
+    outputs = []
+
+    if "txt" in targets:
+        outputs.append(f"TXT → {targets['txt']}{note}")
+    if "csv" in targets:
+        outputs.append(f"CSV → {targets['csv']}{note}")
+    if "jsonl" in targets:
+        outputs.append(f"JSONL → {targets['jsonl']}{note}")
+
+    for kind, count, index, tag, offset in meta["warnings"]:
+        outputs.append(
+            f"[WARN] {path}: {count} sub-entries with {kind} string offsets "
+            f"(first: entry {index}, tag 0x{tag:04X}, offset 0x{offset:05X})"
+        )
+
+    if meta.get("fallback"):
+        count, group, entry = meta["fallback"]
+        outputs.append(
+            f"[WARN] {path}: mixed encoding, {count} entries are not UTF-8 and were read as cp1252 "
+            f"(first: group {group}, entry {entry})"
+        )
+
+    return outputs
+
+
+def _base_lng(base, path, root=None):
+    # --base pode ser o .lng original ou uma pasta/zip com os originais (batch).
+    # Na pasta e no zip vale o mesmo caminho relativo da saída (root), e só
+    # se ele não existir o mesmo nome de arquivo
+    if base and os.path.isdir(base):
+        name = _archive_name(path, ".lng", root)
+        found = os.path.join(base, *name.split("/"))
+        if os.path.isfile(found):
+            return found
+        return os.path.join(base, name.rsplit("/", 1)[-1])
+
+    if base and base.lower().endswith(".zip") and os.path.isfile(base):
+        from core.archive import find_member, member_path
+
+        name = _archive_name(path, ".lng", root)
+        return find_member(base, name) or member_path(base, name)
+
+    return base
+
+
+def rebuild_file(path, output=None, output_dir=None, optimize_pool=False, tags=None, base=None, archive=None,
+                 extend_glyphs=False, root=None):
+    """
+    archive: zip de saída; como no extract_file, devolve (mensagens, arquivos).
+    root: como no extract_file.
+    """
+    if archive:
+        output = _archive_name(path, ".new.lng", root)
+    else:
+        output = output or _output_base(path, output_dir, root) + ".new.lng"
+
+    base = _base_lng(base, path, root)
+    options = {"optimize_pool": optimize_pool, "tags": tags, "base": base, "archive": archive,
+               "extend_glyphs": extend_glyphs}
+
+    # o fonte é lido linha a linha (do disco ou do zip) enquanto o rebuild
+    # consome as entradas
+    if path.endswith(".txt"):
+        with _open_text(path) as f:
+            return rebuild_data(_counted(read_txt(f)), output, **options)
+
+    if path.endswith(".csv"):
+        from core.csv import read_csv
+
+        with _open_text(path, newline="") as f:
+            return rebuild_data(_counted(read_csv(f)), output, **options)
+
+    if path.endswith(".jsonl"):
+        from core.jsonl import read_jsonl
+
+        with _open_text(path) as f:
+            return rebuild_data(_counted(read_jsonl(f)), output, **options)
+
+    raise ValueError("formato desconhecido")
+
+
+def _counted(data):
+    data["entries"] = profile.iterate("parse-input", data["entries"])
+    return data
+
+
+# nome nas mensagens do rebuild
+GAME_NAMES = {
+    "ob1": "OB1",
+    "ob2": "OB2",
+    "finalexam": "FINAL EXAM",
+}
+
+# entradas com glifos faltando listadas uma a uma; o resto vira um total
+GLYPH_REPORT_LIMIT = 20
+
+
+def rebuild_data(data, output, optimize_pool=False, tags=None, base=None, archive=None, extend_glyphs=False):
+    """
+    Grava em output o .lng montado por api.rebuild.
+    base: .lng original. Se dado, só as entradas alteradas são codificadas;
+    as demais são copiadas byte a byte do original (patch).
+    archive: zip de saída; nada é gravado e volta (mensagens, [(output, bytes)]).
+    extend_glyphs: Final Exam, acrescenta à tabela de glifos os caracteres
+    que faltam (sem ele, só são avisados).
+    """
+    entries = data.get("entries", [])
+    game = data.get("game", "").lower()
+    game = ALIASES.get(game, game)
+    stats = {}
+
+    if game not in GAME_NAMES:
+        raise ValueError(f"jogo desconhecido: {game}")
+
+    if not data.get("header"):
+        # sem header e sem entradas não é um arquivo do extract (ex.: um
+        # README.csv): erro em vez de um .lng vazio
+        rest = iter(entries)
+        first = next(rest, None)
+        if first is None:
+            raise NotSourceError("no header and no entries: not a file exported by lngtool")
+        data = dict(data, entries=itertools.chain([first], rest))
+
+    # tempo de codificar/montar o arquivo; parse-input e write ficam de fora
+    with profile.stage("encode") as span:
+        source = _source(base) if base else None
+        out = api.rebuild(data, base=source, optimize_pool=optimize_pool, tags=tags, stats=stats,
+                          extend_glyphs=extend_glyphs)
+        span.entries = getattr(entries, "count", 0)
+
+    if not archive:
+        with profile.stage("write"):
+            write_atomic(output, out)
+
+    shown = output
+    if archive:
+        from core.archive import member_path
+
+        shown = member_path(archive, output)
+
+    messages = [f"{GAME_NAMES[game]} rebuild → {shown}"]
+
+    if game == "finalexam" and optimize_pool and not base:
+        before, after = stats["pool_size_plain"], stats["pool_size"]
+        saved = 100.0 * (before - after) / before if before else 0.0
+        messages.append(f"string pool {before} → {after} bytes (-{saved:.1f}%)")
+
+    if base:
+        messages.append(f"patch: {stats['changed']} of {stats['total']} entries re-encoded (base {base})")
+
+    messages += _glyph_messages(output, stats)
+
+    if archive:
+        return messages, [(output, bytes(out))]
+
+    return messages
+
+
+def _glyph_messages(output, stats):
+    missing = stats.get("missing_glyphs")
+    if not missing:
+        return []
+
+    added = stats.get("glyphs_added", 0)
+    note = f"; {added} glyphs appended to the table" if added else " (--extend-glyphs appends them)"
+    messages = [f"[WARN] {output}: {len(missing)} entries use characters missing from the glyph table{note}"]
+
+    for sid, chars in missing[:GLYPH_REPORT_LIMIT]:
+        listed = " ".join(f"{c} U+{ord(c):04X}" for c in chars)
+        messages.append(f"[WARN]     sid 0x{sid:08X}: {listed}")
+
+    if len(missing) > GLYPH_REPORT_LIMIT:
+        messages.append(f"[WARN]     ... and {len(missing) - GLYPH_REPORT_LIMIT} more entries")
+
+    return messages
+
+
+# ==========================
+#           BATCH
+# ==========================
+def _run_one(func, path, kwargs):
+    try:
+        return path, True, func(path, **kwargs)
+    except Exception as e:
+        return path, False, f"{type(e).__name__}: {e}"
+
+
+def run_batch(func, paths, jobs=0, **kwargs):
+    """
+    Roda func(path, **kwargs) em cada arquivo e gera (path, ok, resultado|erro)
+    na ordem em que terminam. jobs=0 usa todos os núcleos; jobs=1 roda sem pool.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    jobs = min(jobs, len(paths))
+
+    if jobs <= 1:
+        for path in paths:
+            yield _run_one(func, path, kwargs)
+        return
+
+    # o pool (e o multiprocessing) só é importado quando vai ser usado
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(_run_one, func, path, kwargs) for path in paths]
+        for fut in as_completed(futures):
+            yield fut.result()
@@ -0,0 +1,187 @@
+# ==========================
+#     EXTRACTION CACHE
+# ==========================
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from core import __version__
+
+DEFAULT_CACHE_SIZE = 512 * 1024 * 1024
+HASH_CHUNK = 1 << 20
+
+# o evict desce até esta fração do limite: as próximas gravações cabem sem
+# varrer o cache de novo a cada uma
+EVICT_TO = 0.9
+
+# tamanho do cache visto por este processo (pasta -> bytes): medido numa
+# varredura na primeira gravação e somado a cada store. Cada worker do
+# batch tem o seu (os herdados no fork são descartados, como no core.archive)
+_totals = {}
+_owner = None
+
+
+def default_cache_dir():
+    """
+    OBSCURE_LNG_CACHE, senão a pasta de cache do usuário
+    (%LOCALAPPDATA% no Windows, $XDG_CACHE_HOME ou ~/.cache no resto).
+    """
+    path = os.environ.get("OBSCURE_LNG_CACHE")
+    if path:
+        return path
+
+    root = (
+        os.environ.get("LOCALAPPDATA")
+        or os.environ.get("XDG_CACHE_HOME")
+        or os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(root, "obscure_lng_tool")
+
+
+def file_digest(path):
+    h = hashlib.blake2b(digest_size=20)
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+
+    return h.hexdigest()
+
+
+class ExtractCache:
+    """
+    Cache por conteúdo das extrações: chave = hash do .lng + versão da
+    ferramenta + formato (+ tabela de tags). Cada entrada é uma pasta com os
+    arquivos gerados e um meta.json; o mtime do meta.json marca o último uso
+    e as entradas mais antigas saem quando o total passa de max_bytes. O
+    total é somado a cada gravação; o cache só é varrido quando ele passa
+    do limite.
+    """
+
+    def __init__(self, root, max_bytes=DEFAULT_CACHE_SIZE):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def key(self, path, *options):
+        parts = [file_digest(path), __version__] + [str(o) for o in options]
+        return hashlib.blake2b("\0".join(parts).encode(), digest_size=20).hexdigest()
+
+    def _dir(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def load(self, key, targets):
+        """
+        Copia os arquivos da entrada para targets ({nome: caminho}) e devolve
+        o meta gravado com eles, ou None se não estiver no cache.
+        """
+        entry = self._dir(key)
+        meta_path = os.path.join(entry, "meta.json")
+
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+
+            for name, target in targets.items():
+                shutil.copyfile(os.path.join(entry, name), target)
+
+            # LRU: marca o uso
+            os.utime(meta_path)
+        except (OSError, ValueError):
+            return None
+
+        return meta
+
+    def store(self, key, files, meta):
+        """
+        Grava files ({nome: caminho}) e meta na entrada. A pasta é montada em
+        um temporário e renomeada, então processos em paralelo não se atrapalham.
+        """
+        entry = self._dir(key)
+        if os.path.isdir(entry):
+            return
+
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=self.root, prefix=".tmp-")
+
+        try:
+            for name, source in files.items():
+                shutil.copyfile(source, os.path.join(tmp, name))
+
+            with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+
+            size = sum(f.stat().st_size for f in os.scandir(tmp))
+            os.rename(tmp, entry)
+        except OSError:
+            # outro processo gravou a mesma entrada primeiro
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+
+        totals = _process_totals()
+        total = totals.get(self.root)
+        if total is None:
+            # primeira gravação deste processo: uma varredura (já com esta entrada)
+            total = self._scan()[1]
+        else:
+            total += size
+
+        if total > self.max_bytes:
+            self.evict()
+        else:
+            totals[self.root] = total
+
+    def _scan(self):
+        # ([(último uso, tamanho, pasta)], total em bytes)
+        entries = []
+        total = 0
+
+        for shard in os.scandir(self.root):
+            if not shard.is_dir() or shard.name.startswith("."):
+                continue
+
+            for entry in os.scandir(shard.path):
+                try:
+                    size = sum(f.stat().st_size for f in os.scandir(entry.path))
+                    used = os.stat(os.path.join(entry.path, "meta.json")).st_mtime
+                except OSError:
+                    continue
+
+                entries.append((used, size, entry.path))
+                total += size
+
+        return entries, total
+
+    def evict(self):
+        """
+        Remove as entradas usadas há mais tempo até o total ficar em
+        EVICT_TO do limite (se passou do limite).
+        """
+        entries, total = self._scan()
+        target = self.max_bytes * EVICT_TO if total > self.max_bytes else self.max_bytes
+
+        # mais antigas primeiro
+        for used, size, path in sorted(entries):
+            if total <= target:
+                break
+
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+            try:
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                pass  # ainda tem outras entradas
+
+        _process_totals()[self.root] = total
+
+
+def _process_totals():
+    global _owner
+
+    if _owner != os.getpid():
+        _totals.clear()
+        _owner = os.getpid()
+
+    return _totals
@@ -1,129 +1,189 @@
 import csv
+import itertools
 
-MAX_CELL = 32000  # evita limite do Excel
+from core.entries import FinalExamEntry, Ob1Entry, Ob2Entry
+from core.txt import HEADER_KEYS, escape_text, header_fields, unescape_text
+
+# primeira célula da linha opcional de header (game, languageCode, ...), logo
+# depois da linha com os nomes das colunas
+HEADER_MARK = "### LANGUAGE"
 
 
 # ==========================
 #        EXPORT CSV
 # ==========================
 def export_csv(data, path):
-    game = data.get("game", "finalexam")
-
     with open(path, "w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.writer(f)
-
-        # =========================
-        # FINAL EXAM
-        # =========================
-        if game in ["finalexam", "final_exam"]:
-
-            writer.writerow([
-                "index",
-                "sid",
-                "tag",
-                "original",
-                "translated"
-            ])
+        write_entry = csv_entry_writer(f, data)
 
-            for entry in data.get("entries", []):
-                index = entry.get("index", 0)
-                sid = f"0x{entry.get('sid', 0):08X}"
+        for e in data.get("entries", []):
+            write_entry(e)
 
-                for tag, text in entry.get("subs", []):
-                    text = text or ""
-                    text = text.replace("\n", "\\n").replace("\r", "\\r")
 
-                    if len(text) > MAX_CELL:
-                        text = text[:MAX_CELL] + "..."
+def _cell(text):
+    # sem cortar textos longos: o rebuild tem que receber o texto inteiro
+    return escape_text(text or "")
 
-                    writer.writerow([
-                        index,
-                        sid,
-                        f"0x{tag:04X}",
-                        text,
-                        ""   # translated
-                    ])
 
-        # =========================
-        # OBSCURE 1
-        # =========================
-        elif game in ["ob1", "obscure1"]:
-
-            writer.writerow([
-                "index",
-                "group",
-                "id",
-                "encoding",
-                "original",
-                "translated"
-            ])
-
-            for e in data.get("entries", []):
-                text = e.get("text", "") or ""
-                text = text.replace("\n", "\\n").replace("\r", "\\r")
-
-                if len(text) > MAX_CELL:
-                    text = text[:MAX_CELL] + "..."
+def csv_entry_writer(f, data):
+    """
+    Escreve o cabeçalho em f e devolve uma função que escreve uma entrada.
 
+    A primeira linha tem os nomes das colunas (planilhas e outros leitores
+    de CSV esperam isso); a segunda leva o header do arquivo (como no TXT),
+    para o rebuild sem --base sair igual ao original.
+    """
+    game = data.get("game", "finalexam")
+    writer = csv.writer(f)
+    meta = [HEADER_MARK] + [f"{k} = {v}" for k, v in header_fields(dict(data, game=game))]
+
+    # =========================
+    # FINAL EXAM
+    # =========================
+    if game in ["finalexam", "final_exam"]:
+
+        writer.writerow([
+            "index",
+            "sid",
+            "tag",
+            "original",
+            "translated"
+        ])
+        writer.writerow(meta)
+
+        def write_final_exam(entry):
+            entry = FinalExamEntry.coerce(entry)
+            index = entry.index
+            sid = f"0x{entry.sid:08X}"
+
+            if not entry.subs:
+                # entrada sem sub-strings: linha sem tag, só para não sumir
+                writer.writerow([index, sid, "", "", ""])
+
+            for tag, text in entry.subs:
                 writer.writerow([
-                    e.get("index", 0),
-                    e.get("group", 0),
-                    e.get("id", 0),
-                    e.get("encoding", 0),
-                    text,   # original
-                    ""      # tradução
+                    index,
+                    sid,
+                    f"0x{tag:04X}",
+                    _cell(text),
+                    ""   # translated
                 ])
-        
-        # =========================
-        # OBSCURE 2
-        # =========================
-        elif game in ["ob2", "obscure2"]:
 
+        return write_final_exam
+
+    # =========================
+    # OBSCURE 1
+    # =========================
+    if game in ["ob1", "obscure1"]:
+
+        writer.writerow([
+            "index",
+            "group",
+            "id",
+            "encoding",
+            "param",
+            "original",
+            "translated"
+        ])
+        writer.writerow(meta)
+
+        def write_ob1(e):
+            e = Ob1Entry.coerce(e)
             writer.writerow([
-                "group_index",
-                "group_id",
-                "entry_index",
-                "meta",
-                "original",
-                "translated"
+                e.index,
+                e.group,
+                e.id,
+                e.encoding,
+                e.get("param", ""),
+                _cell(e.text),   # original
+                ""      # tradução
             ])
 
-            for e in data.get("entries", []):
-                text = e.get("text", "") or ""
-                text = text.replace("\n", "\\n").replace("\r", "\\r")
+        return write_ob1
+
+    # =========================
+    # OBSCURE 2
+    # =========================
+    if game in ["ob2", "obscure2"]:
+
+        writer.writerow([
+            "group_index",
+            "group_id",
+            "entry_index",
+            "meta",
+            "encoding",
+            "original",
+            "translated"
+        ])
+        writer.writerow(meta)
+
+        def write_ob2(e):
+            e = Ob2Entry.coerce(e)
+            writer.writerow([
+                e.group_index,
+                e.group_id,
+                e.entry_index,
+                e.meta,
+                e.get("encoding", ""),
+                _cell(e.text),
+                ""
+            ])
 
-                if len(text) > MAX_CELL:
-                    text = text[:MAX_CELL] + "..."
+        return write_ob2
 
-                writer.writerow([
-                    e.get("group_index", 0),
-                    e.get("group_id", 0),
-                    e.get("entry_index", 0),
-                    e.get("meta", 0),
-                    text,
-                    ""
-                ])
-
-        else:
-            raise ValueError(f"Unknown game type: {game}")
+    raise ValueError(f"Unknown game type: {game}")
 
 
 # ==========================
 #        IMPORT CSV
 # ==========================
 def parse_csv(path):
-    import csv
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        data = read_csv(f)
+        data["entries"] = list(data["entries"])
+
+    return data
+
+
+def read_csv(f):
+    """
+    Lê o CSV de um arquivo aberto (newline="", utf-8-sig) e devolve
+    {"game", "header", "entries"} com "entries" como gerador.
+
+    Em todos os jogos a coluna "translated" ganha de "original" quando
+    está preenchida. A linha "### LANGUAGE" vira o "header": logo depois
+    dos nomes das colunas ou, nos CSVs da versão anterior, antes deles.
+    Sem ela o header fica vazio, como antes.
+    """
+    reader = csv.reader(f)
+    headers = next(reader, [])
+    header = {}
+
+    if _is_header_row(headers):
+        header = _header_row(headers)
+        headers = next(reader, [])
+
+    headers = [h.strip().lower() for h in headers]
+
+    # nas entradas, a linha "### LANGUAGE" fora do lugar (planilha
+    # reordenada) é pulada
+    rows = reader
 
-    entries = {}
+    if not header:
+        first = next(reader, None)
+        if _is_header_row(first):
+            header = _header_row(first)
+        elif first is not None:
+            rows = itertools.chain([first], reader)
 
-    with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        headers = reader.fieldnames or []
+    # =========================
+    # OBSCURE 1 / OB2 / FINAL EXAM DETECTION
+    # =========================
 
-        # =========================
-        # OBSCURE 1 / OB2 / FINAL EXAM DETECTION
-        # =========================
+    # o game do header (CSVs novos) ganha das colunas
+    game = header.get("game", "").lower()
 
+    if game not in ("ob1", "ob2", "finalexam"):
         if "group" in headers and "encoding" in headers:
             game = "ob1"
         elif "sid" in headers and "tag" in headers:
@@ -131,54 +191,130 @@ def parse_csv(path):
         else:
             game = "ob2"
 
-        # =========================
-        # OB1
-        # =========================
-        if game == "ob1":
-            for row in reader:
-                index = int(row.get("index", 0))
-
-                entries[index] = {
-                    "index": index,
-                    "group": int(row.get("group", 0)),
-                    "id": int(row.get("id", 0)),
-                    "encoding": int(row.get("encoding", 0)),
-                    "text": row.get("translated") or row.get("original") or ""
-                }
-
-            return {
-                "game": "ob1",
-                "entries": list(entries.values())
-            }
-
-        # =========================
-        # FINAL EXAM
-        # =========================
-        if game == "finalexam":
-            entries = {}
-
-            for row in reader:
-                sid = int(row["sid"], 16)
-                tag = int(row["tag"], 16)
-                text = row.get("text", "")
-
-                if sid not in entries:
-                    entries[sid] = {
-                        "sid": sid,
-                        "subs": []
-                    }
-
-                entries[sid]["subs"].append((tag, text))
-
-            return {
-                "game": "finalexam",
-                "entries": list(entries.values())
-            }
-
-        # =========================
-        # OB2 (SIMPLES - fallback)
-        # =========================
-        return {
-            "game": "ob2",
-            "entries": []
-        }
\ No newline at end of file
+    col = {name: i for i, name in enumerate(headers)}
+    original = col.get("original")
+    translated = col.get("translated")
+
+    def cell(row, name, base=10):
+        i = col.get(name)
+        if i is None or i >= len(row) or not row[i].strip():
+            return 0
+
+        try:
+            return int(row[i], base)
+        except ValueError:
+            raise ValueError(f"line {reader.line_num}: invalid {name} = {row[i]!r}") from None
+
+    def text(row):
+        for i in (translated, original):
+            if i is not None and i < len(row) and row[i]:
+                return unescape_text(row[i])
+        return ""
+
+    def optional(row, name, base=None):
+        # coluna ausente ou vazia -> None (campo não dado); base: número
+        i = col.get(name)
+        if i is None or i >= len(row) or not row[i].strip():
+            return None
+        return row[i].strip() if base is None else cell(row, name, base)
+
+    # =========================
+    # OB1
+    # =========================
+    def iter_ob1():
+        entries = {}
+
+        for row in rows:
+            if not row or row[0] == HEADER_MARK:
+                continue
+
+            index = cell(row, "index")
+
+            # sem param (CSV antigo): o rebuild com --base usa a do original
+            entries[index] = Ob1Entry(
+                index,
+                cell(row, "group"),
+                cell(row, "id"),
+                cell(row, "encoding"),
+                optional(row, "param", 10),
+                text(row)
+            )
+
+        yield from entries.values()
+
+    # =========================
+    # FINAL EXAM
+    # =========================
+    def iter_final_exam():
+        # as linhas de uma entrada vêm juntas, mas o CSV pode ter sido
+        # reordenado numa planilha; o pool do FE é pequeno, então agrupa tudo
+        entries = {}
+        has_index = "index" in col
+
+        for row in rows:
+            if not row or row[0] == HEADER_MARK:
+                continue
+
+            sid = cell(row, "sid", 16)
+            key = cell(row, "index") if has_index else sid
+
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = FinalExamEntry(
+                    key if has_index else len(entries),
+                    sid,
+                    []
+                )
+
+            if optional(row, "tag") is not None:
+                entry.subs.append((cell(row, "tag", 16), text(row)))
+
+        yield from entries.values()
+
+    # =========================
+    # OB2
+    # =========================
+    def iter_ob2():
+        # uma linha -> uma entrada; o rebuild_ob2 agrupa por
+        # group_index/entry_index e preenche os buracos
+        for row in rows:
+            if not row or row[0] == HEADER_MARK:
+                continue
+
+            yield Ob2Entry(
+                cell(row, "group_index"),
+                cell(row, "group_id"),
+                cell(row, "entry_index"),
+                cell(row, "meta"),
+                text(row),
+                optional(row, "encoding")
+            )
+
+    if game == "ob1":
+        entries = iter_ob1()
+    elif game == "finalexam":
+        entries = iter_final_exam()
+    else:
+        entries = iter_ob2()
+
+    return {
+        "game": game,
+        "header": header,
+        "entries": entries
+    }
+
+
+def _is_header_row(row):
+    return bool(row) and row[0].strip() == HEADER_MARK
+
+
+def _header_row(row):
+    header = {}
+
+    for field in row[1:]:
+        k, sep, v = field.partition("=")
+        if sep:
+            k = k.strip().lower()
+            header[HEADER_KEYS.get(k, k)] = v.strip()
+
+    return header
@@ -1,35 +1,218 @@
 # ==========================================================
 #      DETECT GAME (ObsCure 1, ObsCure 2 or Final Exam)
 # ==========================================================
+"""
+Detecção por estrutura: para cada formato (e cada ordem de bytes) o começo
+da tabela de entradas é percorrido com o arquivo mapeado, sem decodificar
+texto, conferindo tamanhos contra o tamanho do arquivo. Cada candidato que
+passa recebe uma confiança:
+
+    1.0   a estrutura inteira foi conferida e termina exatamente no fim do arquivo
+    0.9   as primeiras SNIFF_RECORDS entradas batem e o resto cabe no arquivo
+    0.6   a estrutura inteira bate, mas sobram bytes depois dela (padding)
+    ...   menos quando algum campo foge do esperado (ex.: v1 != 1 no Final Exam)
+
+sniff() devolve todos os candidatos do mais para o menos provável;
+detect_game() só o nome do jogo (ou "unknown") para quem já usava.
+"""
+import mmap
+import os
 import struct
+from collections import namedtuple
 
-def detect_game(path):
+Detection = namedtuple("Detection", "game confidence byte_order")
+
+# registros percorridos por formato: o bastante para descartar os outros
+# formatos sem custar mais que alguns microssegundos por arquivo
+SNIFF_RECORDS = 32
+MAX_ENTRIES = 200000
+MAX_TEXT_LEN = 0x10000
+
+# o que o extract sabe ler; os outros candidatos só aparecem no sniff()
+SUPPORTED = {
+    "ob1": ">",
+    "ob2": "<",
+    "finalexam": "<",
+}
+
+MIN_CONFIDENCE = 0.5
+
+_U32 = {order: struct.Struct(order + "I") for order in "<>"}
+_U32X2 = {order: struct.Struct(order + "II") for order in "<>"}
+_U32X5 = {order: struct.Struct(order + "5I") for order in "<>"}
+# só text_len e encoding (group/id não dizem nada)
+_OB1_LEN_ENC = {order: struct.Struct(order + "IB") for order in "<>"}
+
+
+# =====================
+# FINAL EXAM
+# =====================
+def _sniff_final_exam(data, order):
+    size = len(data)
+    if size < 24:
+        return 0.0
+
+    v1, magic, total_subs, entry_count, glyph_count = _U32X5[order].unpack_from(data, 0)
+
+    if (magic & 0xFF00FFFF) != 0x01000000:
+        return 0.0
+
+    table = 20 + 4 * glyph_count
+    pool = table + 8 * (entry_count + total_subs)
+    if pool + 4 > size:
+        return 0.0
+
+    # cabeçalhos (sid, count) das primeiras entradas dentro da tabela
+    pair = _U32X2[order].unpack_from
+    pos = table
+    subs = 0
+    for _ in range(min(entry_count, SNIFF_RECORDS)):
+        if pos + 8 > pool:
+            return 0.0
+        n = pair(data, pos)[1]
+        subs += n
+        pos += 8 + 8 * n
+        if subs > total_subs or pos > pool:
+            return 0.0
+
+    if entry_count <= SNIFF_RECORDS and pos != pool:
+        return 0.0
+
+    end = pool + 4 + _U32[order].unpack_from(data, pool)[0]
+    confidence = 1.0 if end == size else 0.6
+    return confidence if v1 == 1 else confidence * 0.8
+
+
+# =====================
+# OBSCURE 1
+# =====================
+def _sniff_ob1(data, order):
+    size = len(data)
+    if size < 8:
+        return 0.0
+
+    language_code, count = _U32X2[order].unpack_from(data, 0)
+    if not 1 <= count <= MAX_ENTRIES:
+        return 0.0
+
+    len_enc = _OB1_LEN_ENC[order].unpack_from
+    pos = 8
+    walked = min(count, SNIFF_RECORDS)
+
+    for _ in range(walked):
+        if pos + 9 > size:
+            return 0.0
+
+        text_len, enc = len_enc(data, pos + 4)
+        # text_len conta o byte de encoding (+ param no UTF-16)
+        if enc > 1 or not 1 + enc <= text_len <= MAX_TEXT_LEN:
+            return 0.0
+
+        pos += 8 + text_len
+
+    if pos > size:
+        return 0.0
+
+    if walked == count:
+        return 1.0 if pos == size else 0.6
+
+    # o resto precisa de pelo menos um cabeçalho por entrada
+    return 0.9 if pos + 9 * (count - walked) <= size else 0.0
+
+
+# =====================
+# OBSCURE 2
+# =====================
+def _sniff_ob2(data, order):
+    size = len(data)
+    if size < 8:
+        return 0.0
+
+    language_code, group_count = _U32X2[order].unpack_from(data, 0)
+    # (group_id, count) e (meta, length): só o segundo campo importa
+    second = _U32[order].unpack_from
+    if not 1 <= group_count <= MAX_ENTRIES:
+        return 0.0
+
+    pos = 8
+    budget = SNIFF_RECORDS
+
+    for g in range(group_count):
+        if budget <= 0:
+            # o resto dos grupos precisa pelo menos do cabeçalho
+            return 0.9 if pos + 8 * (group_count - g) <= size else 0.0
+
+        if pos + 8 > size:
+            return 0.0
+
+        entry_count = second(data, pos + 4)[0]
+        pos += 8
+        if entry_count > MAX_ENTRIES or pos + 8 * entry_count > size:
+            return 0.0
+
+        for _ in range(entry_count):
+            if budget <= 0:
+                return 0.9
+            budget -= 1
+
+            length = second(data, pos + 4)[0]
+            pos += 8 + length
+            if pos > size:
+                return 0.0
+
+        budget -= 1
+
+    return 1.0 if pos == size else 0.6
+
+
+_SNIFFERS = (
+    ("finalexam", _sniff_final_exam),
+    ("ob1", _sniff_ob1),
+    ("ob2", _sniff_ob2),
+)
+
+
+def sniff_data(data):
+    """
+    Candidatos para o conteúdo de um .lng (bytes/memoryview), do mais
+    provável para o menos; lista vazia se nenhum formato bate.
+    """
+    found = []
+
+    for game, sniffer in _SNIFFERS:
+        for order in (SUPPORTED[game], "<" if SUPPORTED[game] == ">" else ">"):
+            confidence = sniffer(data, order)
+            if confidence:
+                found.append(Detection(game, confidence, "big" if order == ">" else "little"))
+
+    # estável: no empate fica a ordem de _SNIFFERS e a ordem de bytes suportada
+    found.sort(key=lambda d: -d.confidence)
+    return found
+
+
+def sniff(path):
+    # mmap direto, sem o LngBuffer: aqui só se olha o começo da tabela e o
+    # custo de abrir o arquivo é a maior parte do tempo
     with open(path, "rb") as f:
-        data = f.read(16)
-
-    if len(data) < 8:
-        return "unknown"
-
-    a_le, b_le = struct.unpack("<II", data[:8])
-    a_be, b_be = struct.unpack(">II", data[:8])
-
-    # =====================
-    # FINAL EXAM
-    # =====================
-    if a_le == 1 and (b_le & 0xFF00FFFF) == 0x01000000:
-        return "finalexam"
-
-    # =====================
-    # OBSCURE 1
-    # =====================
-    if a_be == 0 and 1 <= b_be <= 200000:
-        return "ob1"
-
-    # =====================
-    # OBSCURE 2
-    # =====================
-    # heuristic extra: languageCode + groupCount sanity
-    if 1 <= b_le <= 200000 and a_le < 10000:
-        return "ob2"
-
-    return "unknown"
\ No newline at end of file
+        if not os.fstat(f.fileno()).st_size:
+            return []
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return sniff_data(mm)
+
+
+def best_game(found):
+    """
+    Primeiro candidato de sniff() que o extract sabe ler, ou "unknown".
+    """
+    for d in found:
+        if d.confidence < MIN_CONFIDENCE:
+            break
+        if (">" if d.byte_order == "big" else "<") == SUPPORTED[d.game]:
+            return d.game
+
+    return "unknown"
+
+
+def detect_game(path):
+    return best_game(sniff(path))
@@ -0,0 +1,98 @@
+# ==========================
+#        ENTRY MODEL
+# ==========================
+"""
+Uma classe com __slots__ por jogo, no lugar de um dict por entrada: são
+~190 bytes a menos por entrada (um dict de 6 chaves tem 272 bytes, o objeto
+80). Extractors, parsers do TXT/CSV, exporters e rebuilds usam os atributos
+(e.text, e.index, ...).
+
+As entradas também se comportam como dict (e["text"], e.get("param"),
+"param" in e, dict(e), ==) para quem ainda usa as chaves; e os rebuilds
+aceitam dicts comuns, convertidos com coerce().
+
+Um campo que não foi dado fica sem valor e não aparece como chave
+(ex.: "param" de um CSV antigo do OB1, "encoding" no OB2).
+"""
+from collections.abc import Mapping
+
+
+class Entry(Mapping):
+    __slots__ = ()
+    FIELDS = ()
+
+    @classmethod
+    def coerce(cls, e):
+        """
+        Entrada deste tipo -> ela mesma; dict (ou outro Mapping) -> nova entrada.
+        """
+        if type(e) is cls:
+            return e
+        return cls(**{k: e[k] for k in cls.FIELDS if k in e})
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return (k for k in self.FIELDS if hasattr(self, k))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+class Ob1Entry(Entry):
+    __slots__ = FIELDS = ("index", "group", "id", "encoding", "param", "text")
+
+    def __init__(self, index=0, group=0, id=0, encoding=0, param=None, text=""):
+        self.index = index
+        self.group = group
+        self.id = id
+        self.encoding = encoding
+        if param is not None:
+            self.param = param
+        self.text = text
+
+
+class Ob2Entry(Entry):
+    # encoding ("utf-8" ou "cp1252"): só nas entradas que não seguem o
+    # encoding do arquivo (header "encoding"), ou seja, num arquivo misto
+    __slots__ = FIELDS = ("group_index", "group_id", "entry_index", "meta", "text", "encoding")
+
+    def __init__(self, group_index=0, group_id=0, entry_index=0, meta=0, text="", encoding=None):
+        self.group_index = group_index
+        self.group_id = group_id
+        self.entry_index = entry_index
+        self.meta = meta
+        self.text = text
+        if encoding is not None:
+            self.encoding = encoding
+
+
+class FinalExamEntry(Entry):
+    # subs: lista de (tag, texto)
+    __slots__ = FIELDS = ("index", "sid", "subs")
+
+    def __init__(self, index=0, sid=0, subs=None):
+        self.index = index
+        self.sid = sid
+        self.subs = [] if subs is None else subs
+
+
+ENTRY_TYPES = {
+    "ob1": Ob1Entry,
+    "ob2": Ob2Entry,
+    "finalexam": FinalExamEntry,
+}
@@ -0,0 +1,96 @@
+# ==========================
+#      INPUT EXPANSION
+# ==========================
+"""
+Lista de arquivos de entrada da CLI (arquivos, pastas, .zip e globs).
+Separado do core.batch para o detect não carregar api, csv, json, ...
+"""
+import os
+
+# fontes do rebuild, na ordem de preferência quando há mais de um com o mesmo nome
+REBUILD_INPUTS = (".txt", ".csv", ".jsonl")
+
+
+def expand_inputs(inputs, exts):
+    """
+    Expande arquivos, diretórios (recursivo), .zip e globs numa lista sem
+    repetição. Um .zip é lido como uma pasta e cada membro vira um caminho
+    "pacote.zip/pasta/arquivo" (ver core.archive). Em diretórios e zips, se
+    existir mais de um fonte com o mesmo nome, ganha a primeira extensão de
+    exts (.txt, depois .csv, depois .jsonl).
+    """
+    import glob
+
+    paths = []
+    seen = set()
+
+    def add(path):
+        key = os.path.normcase(os.path.abspath(path))
+        if key not in seen:
+            seen.add(key)
+            paths.append(path)
+
+    for item in inputs:
+        item = item.strip('"')
+        members = None if ".zip" in exts else _members(item, exts)
+
+        if os.path.isdir(item):
+            found = []
+            for root, dirs, files in os.walk(item):
+                dirs.sort()
+                for name in sorted(files):
+                    low = name.lower()
+                    if low.endswith(exts) and not low.endswith(".new.lng"):
+                        found.append(os.path.join(root, name))
+
+            for p in _preferred(found, exts):
+                add(p)
+
+        elif members is not None:
+            for p in members:
+                add(p)
+
+        elif glob.has_magic(item):
+            for p in sorted(glob.glob(item, recursive=True)):
+                members = _members(p, exts)
+                if members is not None:
+                    for member in members:
+                        add(member)
+                elif os.path.isfile(p):
+                    add(p)
+
+        else:
+            add(item)
+
+    return paths
+
+
+def _preferred(found, exts):
+    # um arquivo por nome (sem extensão): o da primeira extensão de exts
+    rank = {ext: i for i, ext in enumerate(exts)}
+    best = {}
+
+    for p in found:
+        stem, ext = os.path.splitext(p)
+        best[stem] = min(best.get(stem, len(exts)), rank.get(ext.lower(), len(exts)))
+
+    keep = []
+    for p in found:
+        stem, ext = os.path.splitext(p)
+        if rank.get(ext.lower(), len(exts)) == best[stem]:
+            keep.append(p)
+
+    return keep
+
+
+def _members(path, exts):
+    # membros de path se for um .zip, senão None. O core.archive (zipfile e
+    # o que ele puxa) só é importado quando aparece um .zip
+    if not path.lower().endswith(".zip"):
+        return None
+
+    from core.archive import is_archive, list_members
+
+    if not is_archive(path):
+        return None
+    return _preferred(list_members(path, exts), exts)
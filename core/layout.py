@@ -0,0 +1,67 @@
+# ==========================
+#      BINARY LAYOUTS
+# ==========================
+"""
+Layout de cada jogo declarado uma vez, com a ordem de bytes explícita, e
+compilado em struct.Struct: extract, rebuild e patch usam os mesmos
+registros, então não tem como um ler big-endian e o outro escrever
+little-endian.
+
+    OB1 = Layout(">", header=[("languageCode", "I"), ("count", "I")], ...)
+    OB1.header.pack_into(buf, 0, code, count)
+    OB1.fields["header"]  ->  ("languageCode", "count")
+"""
+import os
+import struct
+from contextlib import contextmanager
+
+
+class Layout:
+    def __init__(self, byte_order, **records):
+        if byte_order not in ("<", ">"):
+            raise ValueError(f"byte order must be '<' or '>', not {byte_order!r}")
+
+        self.byte_order = byte_order
+        self.fields = {}
+
+        for name, fields in records.items():
+            setattr(self, name, struct.Struct(byte_order + "".join(fmt for _, fmt in fields)))
+            self.fields[name] = tuple(field for field, _ in fields)
+
+    def array(self, fmt, count):
+        """
+        Struct de count valores seguidos (ex.: a tabela de glifos do Final Exam).
+        """
+        return struct.Struct(f"{self.byte_order}{count}{fmt}")
+
+
+def write_atomic(path, data):
+    """
+    Grava data num temporário ao lado de path e renomeia por cima: quem lê
+    path (o jogo, o watch, outro processo do batch) nunca vê o arquivo pela
+    metade, e um erro no meio deixa o arquivo anterior intacto.
+    """
+    with open_atomic(path) as f:
+        f.write(data)
+
+    return path
+
+
+@contextmanager
+def open_atomic(path, mode="wb", **options):
+    """
+    O write_atomic para quem escreve aos poucos (o extract em streaming):
+    devolve o arquivo temporário, que só vira path se o bloco terminar sem erro.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        with open(tmp, mode, **options) as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,197 @@
+# ==========================
+#     STAGE PROFILER
+# ==========================
+"""
+Tempo e memória por etapa (--profile).
+
+As funções de games/ e core/ marcam as etapas com stage() (blocos),
+wrap() (funções chamadas por string/entrada) e iterate() (geradores de
+entradas). Desligado, stage() devolve um contexto vazio compartilhado e
+wrap()/iterate() devolvem o próprio objeto, então o custo é uma chamada
+por arquivo, não por entrada.
+
+O tempo de cada etapa é exclusivo: o que roda dentro de uma etapa aninhada
+(ex.: decode-strings dentro de parse-table) conta só para a de dentro.
+A memória é o pico do tracemalloc enquanto a etapa estava ativa.
+"""
+import time
+
+tracemalloc = None  # importado só com memory=True
+
+STAGES = (
+    "read",
+    "parse-table",
+    "decode-strings",
+    "transform-tags",
+    "export",
+    "parse-input",
+    "encode",
+    "write",
+)
+
+_stats = None
+_stack = []
+_memory = False
+
+
+def enable(memory=False):
+    global _stats, _memory, tracemalloc
+
+    _stats = {}
+    _memory = memory
+
+    if memory:
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+
+def disable():
+    global _stats
+
+    _stats = None
+    _stack.clear()
+
+    if _memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def enabled():
+    return _stats is not None
+
+
+class _NullStage:
+    # "entries" pode ser atribuído e é ignorado
+    entries = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("name", "entries", "start", "child", "peak")
+
+    def __init__(self, name, entries=0):
+        self.name = name
+        self.entries = entries
+
+    def __enter__(self):
+        if _memory:
+            if _stack:
+                # guarda o pico até aqui na etapa de fora antes de zerar
+                parent = _stack[-1]
+                parent.peak = max(parent.peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self.peak = 0
+        self.child = 0.0
+        _stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        _stack.pop()
+
+        stat = _stats.get(self.name)
+        if stat is None:
+            stat = _stats[self.name] = [0.0, 0, 0, 0]
+
+        stat[0] += elapsed - self.child
+        stat[1] += 1
+        stat[2] += self.entries
+
+        if _memory:
+            peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            stat[3] = max(stat[3], peak)
+            if _stack:
+                _stack[-1].peak = max(_stack[-1].peak, peak)
+
+        if _stack:
+            _stack[-1].child += elapsed
+
+        return False
+
+
+def stage(name, entries=0):
+    if _stats is None:
+        return _NULL
+    return _Stage(name, entries)
+
+
+def wrap(name, func):
+    """
+    Cada chamada de func conta como uma entrada da etapa name.
+    """
+    if _stats is None:
+        return func
+
+    def timed(*args):
+        with _Stage(name, 1):
+            return func(*args)
+
+    return timed
+
+
+class _Counted:
+    """
+    Itera source medindo cada next() na etapa name; count = itens gerados.
+    """
+
+    def __init__(self, name, source):
+        self.name = name
+        self.source = iter(source)
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with _Stage(self.name) as s:
+            item = next(self.source)
+            s.entries = 1
+        self.count += 1
+        return item
+
+    def close(self):
+        close = getattr(self.source, "close", None)
+        if close is not None:
+            close()
+
+
+def iterate(name, source):
+    if _stats is None:
+        return source
+    return _Counted(name, source)
+
+
+def report():
+    """
+    {"stages": {etapa: {seconds, calls, entries, entries_per_s, peak_bytes}}, "total_seconds"}
+    na ordem de STAGES (etapas desconhecidas no fim).
+    """
+    stages = {}
+    names = [n for n in STAGES if n in _stats] + [n for n in _stats if n not in STAGES]
+
+    for name in names:
+        seconds, calls, entries, peak = _stats[name]
+        row = {
+            "seconds": round(seconds, 6),
+            "calls": calls,
+            "entries": entries,
+            "entries_per_s": round(entries / seconds) if seconds and entries else None,
+        }
+        if _memory:
+            row["peak_bytes"] = peak
+        stages[name] = row
+
+    return {
+        "stages": stages,
+        "total_seconds": round(sum(s[0] for s in _stats.values()), 6),
+        "memory": _memory,
+    }
@@ -0,0 +1,101 @@
+import mmap
+import os
+
+
+# ==========================
+#     ZERO-COPY READER
+# ==========================
+class LngBuffer:
+    """
+    Mapeia o .lng com mmap (somente leitura) e entrega fatias como memoryview.
+    Nada é copiado até o decode final do texto. Só o Final Exam lê assim
+    (lê poucos bytes de cada string do pool); Obscure 1 e 2 fatiam o
+    arquivo inteiro e usam read_lng, porque fatiar bytes é bem mais rápido.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mm = None
+
+        if os.fstat(self._file.fileno()).st_size:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.view = memoryview(self._mm)
+            # find(sub, start, end) direto do mmap, sem camada Python
+            self.find = self._mm.find
+        else:
+            # mmap não aceita arquivo vazio
+            self.view = memoryview(b"")
+
+    def __len__(self):
+        return len(self.view)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def find(self, sub, start=0, end=None):
+        # só usado com arquivo vazio; senão é o mmap.find
+        return -1
+
+    def close(self):
+        self.view.release()
+
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                # ainda existe alguma fatia viva; o GC fecha depois
+                pass
+            self._mm = None
+
+        if self._file is not None:
+            self._file.close()
+
+
+class MemoryLngBuffer(LngBuffer):
+    """
+    A mesma interface do LngBuffer (view, find, close) sobre um .lng
+    que já está na memória.
+    """
+
+    def __init__(self, data):
+        self._file = None
+        self._mm = None
+        self.view = memoryview(data)
+        self.find = data.find
+
+
+def is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+
+def read_lng(source):
+    """
+    Conteúdo de um .lng como bytes (ou o próprio bytes/bytearray recebido):
+    caminho, bytes, bytearray, memoryview (ou outro buffer, copiado uma
+    vez) ou arquivo binário aberto (lido do ponto atual até o fim).
+    """
+    if is_path(source):
+        with open(source, "rb") as f:
+            return f.read()
+
+    if isinstance(source, (bytes, bytearray)):
+        return source
+
+    if hasattr(source, "read"):
+        return source.read()
+
+    # memoryview, mmap, array...: find e fatias rápidas só em bytes
+    return memoryview(source).tobytes()
+
+
+def open_lng(source):
+    """
+    Caminho -> arquivo mapeado (mmap); bytes, buffers e arquivos abertos ->
+    o conteúdo em memória (read_lng).
+    """
+    if is_path(source):
+        return LngBuffer(source)
+    return MemoryLngBuffer(read_lng(source))
@@ -2,43 +2,114 @@
 #          .TXT
 # ==========================
 
+import io
+import itertools
+import re
 import unicodedata
 
+from core.entries import FinalExamEntry, Ob1Entry, Ob2Entry
+
 
 # =====================
 #        PARSE
 # =====================
+ENTRY_MARK = "### ENTRY"
+LANGUAGE_MARK = "### LANGUAGE"
+# a marca sozinha na linha (espaços em volta valem, como no strip())
+_MARK_LINE = re.compile(r"^[^\S\n]*" + re.escape(ENTRY_MARK) + r"[^\S\n]*$", re.M)
+CHUNK_SIZE = 1 << 20
+
+# memo: entrada que ainda não foi montada (None = bloco ignorado)
+_MISSING = object()
+
+# campos de cada jogo -> base do int() (None: texto)
+META_FIELDS = {
+    "finalexam": {"index": 10, "sid": 16},
+    "ob2": {"group_index": 10, "group_id": 10, "entry_index": 10, "meta": 10, "encoding": None},
+    "ob1": {"index": 10, "group": 10, "id": 10, "encoding": 10, "param": 10},
+}
+
+# chaves do header são lidas em minúsculas; estas voltam ao nome usado nos
+# dicts do extract e nos rebuilds
+HEADER_KEYS = {"languagecode": "languageCode"}
+
+
+class NotSourceError(ValueError):
+    """Arquivo que não saiu do extract (sem header e sem entradas)."""
+
+
+# escapes do texto: \\ (barra), \n, \r e \# (texto "### ENTRY"); outra barra
+# fica como está (TXT antigo)
+_ESCAPES = re.compile(r"\\([\\nr#])")
+_UNESCAPED = {"\\": "\\", "n": "\n", "r": "\r", "#": "#"}
+
+
 def parse_txt(content: str):
-    content = content.replace("\r\n", "\n").replace("\r", "\n")
+    data = read_txt(io.StringIO(content, newline=None))
+    data["entries"] = list(data["entries"])
+    return data
 
-    header = {}
-    entries = []
 
-    blocks = content.split("### ENTRY")
+def read_txt(f, memo=None):
+    """
+    Parser incremental: lê de um arquivo aberto (modo texto) e devolve
+    {"game", "header", "entries"} com "entries" como gerador.
+
+    Só uma linha que seja exatamente "### ENTRY" abre uma entrada; o mesmo
+    texto no meio de uma tradução não quebra mais o parse. Sem "### LANGUAGE"
+    e sem nenhum "### ENTRY" (um README.txt, um log) é ValueError.
+
+    memo (dict opcional, watch): texto da entrada -> entrada já montada numa
+    leitura anterior do mesmo arquivo. Entradas iguais não são montadas de
+    novo; ao fim da leitura o memo fica só com as entradas desta leitura.
+    As entradas do memo são compartilhadas: não devem ser alteradas.
+    """
+    header = {}
 
     # ======================
     # HEADER
     # ======================
-    header_part = blocks[0] if blocks else ""
+    lineno = 0
+    found = False
+    language = False
 
-    for line in header_part.split("\n"):
+    for line in iter(f.readline, ""):
+        lineno += 1
         line = line.strip()
+
+        if line == ENTRY_MARK:
+            found = True
+            break
+
+        if line == LANGUAGE_MARK:
+            language = True
+            continue
+
         if "=" in line:
             k, v = line.split("=", 1)
-            header[k.strip().lower()] = v.strip()
+            k = k.strip().lower()
+            header[HEADER_KEYS.get(k, k)] = v.strip()
+
+    if not found and not language:
+        raise NotSourceError(f"no {LANGUAGE_MARK} header and no {ENTRY_MARK}: not a lngtool TXT")
+
+    blocks = _iter_blocks(f, lineno) if found else iter(())
 
     # ======================
     # GAME DETECTION (ROBUST)
     # ======================
     game_raw = header.get("game", "").strip().lower()
 
+    pending = None
+
     if not game_raw:
-        # fallback por estrutura
-        if "[tag=" in content:
+        # fallback pelas chaves da primeira entrada
+        pending = next(blocks, None)
+        meta = _split_block(*pending)[0] if pending else ""
+
+        if "sid" in meta:
             game = "finalexam"
-        elif "encoding" in content and "group =" in content:
-            game = "ob1"
-        elif "group_index" in content:
+        elif "group_index" in meta:
             game = "ob2"
         else:
             game = "ob1"
@@ -52,211 +123,315 @@ def parse_txt(content: str):
         else:
             game = game_raw
 
-    # ======================
-    # ENTRIES
-    # ======================
-    for block in blocks[1:]:
-        block = block.strip()
-        if not block:
-            continue
+    def iter_entries():
+        if pending is not None:
+            entry = _build_entry(game, *pending)
+            if entry is not None:
+                yield entry
 
-        meta_end = block.find("###")
-        if meta_end == -1:
-            continue
+        for text, start in blocks:
+            entry = _build_entry(game, text, start)
+            if entry is not None:
+                yield entry
 
-        meta = block[:meta_end].strip()
-        body = block[meta_end + 3:].strip()
-
-        body = body.replace("\\r", "\r").replace("\\n", "\n")
-
-        # ======================
-        # FINAL EXAM PARSER (FIX PRINCIPAL)
-        # ======================
-        if game == "finalexam":
-            subs = []
-
-            for line in body.split("\n"):
-                line = line.strip()
-
-                if not line:
-                    continue
-
-                if line.startswith("[tag="):
-                    end = line.find("]")
-                    if end == -1:
-                        continue
-
-                    tag_str = line[5:end]
-                    text = line[end + 1:].strip()
-
-                    try:
-                        tag = int(tag_str, 16)
-                    except:
-                        tag = 0
-
-                    text = text.replace("\\r", "\r").replace("\\n", "\n")
-
-                    subs.append((tag, text))
-
-            entry = {
-                "index": 0,
-                "sid": 0,
-                "subs": subs
-            }
-
-        # ======================
-        # OB2 STRUCT
-        # ======================
-        elif game == "ob2":
-            entry = {
-                "group_index": 0,
-                "group_id": 0,
-                "entry_index": 0,
-                "meta": 0,
-                "text": body
-            }
-
-        # ======================
-        # OB1 STRUCT
-        # ======================
-        else:
-            entry = {
-                "index": 0,
-                "group": 0,
-                "id": 0,
-                "encoding": 0,
-                "param": 0,
-                "text": body
-            }
-
-        # ======================
-        # META PARSING
-        # ======================
-        for line in meta.split("\n"):
-            line = line.strip()
-            if "=" not in line:
-                continue
+    def iter_memo():
+        fresh = {}
 
-            k, v = line.split("=", 1)
-            k = k.strip().lower()
-            v = v.strip()
-
-            if game == "finalexam":
-                if k == "index":
-                    entry["index"] = int(v)
-                elif k == "sid":
-                    entry["sid"] = int(v, 16)
-
-            elif game == "ob2":
-                if k == "group_index":
-                    entry["group_index"] = int(v)
-                elif k == "group_id":
-                    entry["group_id"] = int(v)
-                elif k == "entry_index":
-                    entry["entry_index"] = int(v)
-                elif k == "meta":
-                    entry["meta"] = int(v)
-
-            else:
-                if k == "index":
-                    entry["index"] = int(v)
-                elif k == "group":
-                    entry["group"] = int(v)
-                elif k == "id":
-                    entry["id"] = int(v)
-                elif k == "encoding":
-                    entry["encoding"] = int(v)
-                elif k == "param":
-                    entry["param"] = int(v)
-
-        entries.append(entry)
+        for text, start in itertools.chain([pending] if pending else (), blocks):
+            entry = memo.get(text, _MISSING)
+            if entry is _MISSING:
+                entry = _build_entry(game, text, start)
+            fresh[text] = entry
+
+            if entry is not None:
+                yield entry
+
+        memo.clear()
+        memo.update(fresh)
 
     return {
         "game": game,
         "header": header,
-        "entries": entries
+        "entries": iter_entries() if memo is None else iter_memo()
     }
 
 
+def _iter_blocks(f, lineno):
+    """
+    Lê f em pedaços de CHUNK_SIZE a partir do "### ENTRY" da linha lineno e
+    gera (texto da entrada, linha do "### ENTRY"). O texto começa no fim da
+    linha da marca. Só a entrada ainda incompleta fica em memória.
+    """
+    # o readline do header já consumiu o "\n" da linha da marca
+    pending = "\n"
+
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+
+        if chunk:
+            pending += chunk
+            # só linhas completas: "### ENTRY" no fim do pedaço pode continuar
+            cut = pending.rfind("\n") + 1
+            if not cut:
+                continue
+            ready, pending = pending[:cut], pending[cut:]
+        else:
+            ready, pending = pending, ""
+
+        parts = _split_entries(ready)
+        # a última entrada continua no próximo pedaço
+        tail = parts.pop() if chunk else None
+
+        for text in parts:
+            yield text, lineno
+            lineno += text.count("\n")
+
+        if tail is None:
+            return
+
+        pending = tail + pending
+
+
+def _split_entries(text):
+    # só uma linha inteira com a marca separa entradas; cada parte depois
+    # da primeira começa no "\n" da linha da marca
+    return _MARK_LINE.split(text)
+
+
+def _split_block(text, lineno):
+    """
+    Separa meta e corpo de uma entrada. Devolve (meta, corpo, linha do corpo)
+    ou None se a entrada não tem o "###" que fecha a meta.
+    """
+    meta_end = text.find("###")
+    if meta_end == -1:
+        return None
+
+    nl = text.find("\n", meta_end)
+    if nl == -1:
+        return text[:meta_end], "", lineno
+
+    return text[:meta_end], text[nl + 1:], lineno + text.count("\n", 0, nl + 1)
+
+
+def unescape_text(text):
+    # também usado pelo CSV
+    if "\\" not in text:
+        return text
+    return _ESCAPES.sub(lambda m: _UNESCAPED[m.group(1)], text)
+
+
+def escape_text(text):
+    # a barra primeiro, senão "\\n" do texto voltaria como quebra de linha
+    if "\\" in text:
+        text = text.replace("\\", "\\\\")
+    text = text.replace("\r", "\\r").replace("\n", "\\n")
+
+    # um texto que é só a marca (com espaços em volta) abriria outra entrada
+    if ENTRY_MARK in text and text.strip() == ENTRY_MARK:
+        text = text.replace("#", "\\#", 1)
+    return text
+
+
+def _build_entry(game, text, lineno):
+    meta_end = text.find("###")
+    if meta_end == -1:
+        # entrada sem "###": ignora, como antes
+        return None
+
+    meta, body, body_line = _split_block(text, lineno)
+
+    # linhas em branco no fim são só separadores (a 1ª linha é sempre texto)
+    stripped = body.rstrip()
+    if len(stripped) != len(body):
+        # devolve espaços do fim da última linha de texto
+        body = stripped + body[len(stripped):].split("\n", 1)[0]
+
+    # ======================
+    # FINAL EXAM PARSER (FIX PRINCIPAL)
+    # ======================
+    if game == "finalexam":
+        subs = []
+
+        for offset, line in enumerate(body.split("\n")):
+            if not line.startswith("[tag="):
+                continue
+
+            end = line.find("]")
+            if end == -1:
+                continue
+
+            try:
+                tag = int(line[5:end], 16)
+            except ValueError:
+                raise ValueError(f"line {body_line + offset}: invalid tag = {line[5:end]!r}") from None
+
+            # "[tag=0x0001] texto": só o espaço separador sai
+            text = line[end + 1:]
+            if text.startswith(" "):
+                text = text[1:]
+
+            subs.append((tag, unescape_text(text)))
+
+        entry = FinalExamEntry(0, 0, subs)
+
+    # ======================
+    # OB2 STRUCT
+    # ======================
+    elif game == "ob2":
+        entry = Ob2Entry(0, 0, 0, 0, unescape_text(body))
+
+    # ======================
+    # OB1 STRUCT
+    # ======================
+    else:
+        entry = Ob1Entry(0, 0, 0, 0, 0, unescape_text(body))
+
+    # ======================
+    # META PARSING
+    # ======================
+    fields = META_FIELDS.get(game, META_FIELDS["ob1"])
+    lines = meta.split("\n")
+
+    for line in lines:
+        k, sep, v = line.partition("=")
+        if not sep:
+            continue
+
+        k = k.strip().lower()
+        if k not in fields:
+            continue
+
+        base = fields[k]
+        if base is None:
+            setattr(entry, k, v.strip())
+            continue
+
+        try:
+            setattr(entry, k, int(v, base))
+        except ValueError:
+            line_no = lineno + lines.index(line)
+            raise ValueError(f"line {line_no}: invalid {k} = {v.strip()!r}") from None
+
+    return entry
+
+
 # =====================
 #       EXPORT
 # =====================
 def export_txt(data, path):
     # UTF-8 SEM BOM igual ao Obscure Text Editor
     with open(path, "w", encoding="utf-8", newline="\n") as f:
+        write_entry = txt_entry_writer(f, data)
+
+        for e in data["entries"]:
+            write_entry(e)
+
+
+def header_fields(data):
+    """
+    (chave, valor) do header de data, na ordem do TXT; o CSV escreve os
+    mesmos campos na linha "### LANGUAGE".
+    """
+    game = data.get("game", "").lower()
+    fields = [("game", game)]
+
+    if game == "finalexam":
+        fields.append(("v1", data.get("v1", 0)))
+        fields.append(("magic", f"0x{data.get('magic', 0):08X}"))
+        fields.append(("glyphs", ",".join(f"0x{x:X}" for x in data.get("glyphs", []))))
+
+    elif game == "ob1":
+        fields.append(("languageCode", data.get("languageCode", 0)))
+
+        if data.get("tags"):
+            fields.append(("tags", data["tags"]))
+
+    elif game == "ob2":
+        fields.append(("languageCode", data.get("languageCode", 0)))
+
+        if data.get("encoding"):
+            fields.append(("encoding", data["encoding"]))
+
+    return fields
+
+
+def txt_entry_writer(f, data):
+    """
+    Escreve o header em f e devolve uma função que escreve uma entrada,
+    para exportar direto de um gerador (ou para vários formatos de uma vez).
+    """
+    game = data.get("game", "").lower()
+
+    # ======================
+    # HEADER
+    # ======================
+    f.write(LANGUAGE_MARK + "\n")
+
+    for k, v in header_fields(data):
+        f.write(f"{k} = {v}\n")
+
+    f.write("###\n\n")
+
+    # ======================
+    # OB1 FORMAT
+    # ======================
+    def write_ob1(e):
+        e = Ob1Entry.coerce(e)
+
+        f.write("### ENTRY\n")
+        f.write(f"index = {e.index}\n")
+        f.write(f"group = {e.group}\n")
+        f.write(f"id = {e.id}\n")
+        f.write(f"encoding = {e.encoding}\n")
+
+        if hasattr(e, "param"):
+            f.write(f"param = {e.param}\n")
+
+        f.write("###\n")
+
+        f.write(escape_text(e.text) + "\n\n")
+
+    # ======================
+    # FINAL EXAM FORMAT
+    # ======================
+    def write_final_exam(e):
+        e = FinalExamEntry.coerce(e)
+
+        f.write("### ENTRY\n")
+        f.write(f"index = {e.index}\n")
+        f.write(f"sid = 0x{e.sid:08X}\n")
+        f.write("###\n")
+
+        for tag, text in e.subs:
+            f.write(f"[tag=0x{tag:04X}] {escape_text(text)}\n")
+
+        f.write("\n")
+
+    # ======================
+    # OB2 FORMAT
+    # ======================
+    def write_ob2(e):
+        e = Ob2Entry.coerce(e)
+
+        f.write("### ENTRY\n")
+        f.write(f"group_index = {e.group_index}\n")
+        f.write(f"group_id = {e.group_id}\n")
+        f.write(f"entry_index = {e.entry_index}\n")
+        f.write(f"meta = {e.meta}\n")
+
+        if hasattr(e, "encoding"):
+            f.write(f"encoding = {e.encoding}\n")
+
+        f.write("###\n")
+
+        f.write(escape_text(e.text) + "\n\n")
+
+    if game == "ob1":
+        return write_ob1
+    if game == "finalexam":
+        return write_final_exam
+    if game == "ob2":
+        return write_ob2
 
-        game = data.get("game", "").lower()
-
-        # ======================
-        # HEADER
-        # ======================
-        f.write("### LANGUAGE\n")
-        f.write(f"game = {game}\n")
-
-        if game == "finalexam":
-            f.write(f"v1 = {data.get('v1', 0)}\n")
-            f.write(f"magic = 0x{data.get('magic', 0):08X}\n")
-            f.write(
-                "glyphs = " +
-                ",".join(f"0x{x:X}" for x in data.get("glyphs", [])) +
-                "\n"
-            )
-
-        elif game == "ob1":
-            f.write(f"languageCode = {data.get('languageCode', 0)}\n")
-
-        f.write("###\n\n")
-
-        # ======================
-        # OB1 FORMAT
-        # ======================
-        if game == "ob1":
-            for e in data["entries"]:
-                f.write("### ENTRY\n")
-                f.write(f"index = {e['index']}\n")
-                f.write(f"group = {e['group']}\n")
-                f.write(f"id = {e['id']}\n")
-                f.write(f"encoding = {e['encoding']}\n")
-
-                if "param" in e:
-                    f.write(f"param = {e['param']}\n")
-
-                f.write("###\n")
-
-                text = e.get("text", "")
-                text = text.replace("\r", "\\r").replace("\n", "\\n")
-
-                f.write(text + "\n\n")
-
-        # ======================
-        # FINAL EXAM FORMAT
-        # ======================
-        elif game == "finalexam":
-            for e in data["entries"]:
-                f.write("### ENTRY\n")
-                f.write(f"index = {e['index']}\n")
-                f.write(f"sid = 0x{e['sid']:08X}\n")
-                f.write("###\n")
-
-                for tag, text in e["subs"]:
-                    text = text.replace("\r", "\\r").replace("\n", "\\n")
-                    f.write(f"[tag=0x{tag:04X}] {text}\n")
-
-                f.write("\n")
-
-        # ======================
-        # OB2 FORMAT
-        # ======================
-        elif game == "ob2":
-            for e in data["entries"]:
-                f.write("### ENTRY\n")
-                f.write(f"group_index = {e['group_index']}\n")
-                f.write(f"group_id = {e['group_id']}\n")
-                f.write(f"entry_index = {e['entry_index']}\n")
-                f.write(f"meta = {e['meta']}\n")
-                f.write("###\n")
-
-                text = e.get("text", "")
-                text = text.replace("\r", "\\r").replace("\n", "\\n")
-
-                f.write(text + "\n\n")
\ No newline at end of file
+    return lambda e: None
@@ -0,0 +1,156 @@
+# ==========================
+#       ROUND-TRIP CHECK
+# ==========================
+"""
+lngtool verify: extract -> TXT/CSV/JSONL -> parse -> rebuild (sem --base) de
+cada .lng, tudo em memória, e o resultado tem que ser igual ao original
+byte a byte. Serve para pegar qualquer mudança que perca informação no
+caminho (campo que o TXT/CSV não leva, escape, encoding, ...).
+
+Num erro, o .lng montado é extraído de novo e a mensagem aponta o primeiro
+campo do header ou a primeira entrada (e o campo) que mudou.
+
+Final Exam: o pool é montado com os textos iguais dividindo o offset, como
+nos arquivos originais. Um pool arrumado de outro jeito (ex.: sufixos
+compartilhados) não volta byte a byte; aí basta header e entradas iguais.
+"""
+import io
+
+from core import api, profile
+from core.csv import csv_entry_writer, read_csv
+from core.jsonl import jsonl_entry_writer, read_jsonl
+from core.archive import read_member, split_member
+from core.reader import read_lng
+from core.txt import header_fields, read_txt, txt_entry_writer
+
+FORMATS = {
+    "txt": (txt_entry_writer, read_txt),
+    "csv": (csv_entry_writer, read_csv),
+    "jsonl": (jsonl_entry_writer, read_jsonl),
+}
+
+# --format: um formato, "both" (TXT e CSV, como no extract) ou "all"
+FORMAT_SETS = {"both": ("txt", "csv"), "all": tuple(FORMATS)}
+
+# tamanho máximo dos valores citados na mensagem de erro
+SHOW_CHARS = 60
+
+
+class RoundTripError(ValueError):
+    pass
+
+
+def verify_file(path, fmt="all", tags="ps2"):
+    """
+    Confere o round trip de path em fmt (ver FORMAT_SETS). Devolve as
+    mensagens do batch; RoundTripError no primeiro formato que não volta
+    igual.
+    """
+    formats = FORMAT_SETS.get(fmt, (fmt,))
+
+    with profile.stage("read"):
+        original = read_member(path) if split_member(path) else read_lng(path)
+
+    # uma extração só para os dois formatos
+    data = api.extract(original, tags=tags)
+
+    for name in formats:
+        rebuilt = round_trip(data, name)
+
+        if rebuilt != original:
+            problem = describe_difference(data, original, rebuilt, tags)
+            if problem is not None:
+                raise RoundTripError(f"{name.upper()}: {problem}")
+
+    names = ", ".join(name.upper() for name in formats)
+    return [f"{path}: {names} round trip ok ({len(data['entries'])} entries)"]
+
+
+def round_trip(data, fmt):
+    """
+    Exporta data (dict do extract, com a lista de entradas) no formato fmt
+    num buffer, lê de volta e devolve o .lng montado.
+    """
+    write, read = FORMATS[fmt]
+
+    # mesmas opções de newline dos arquivos do extract/rebuild
+    with profile.stage("export") as span:
+        out = io.StringIO(newline="" if fmt == "csv" else "\n")
+        write_entry = write(out, data)
+
+        for e in data["entries"]:
+            write_entry(e)
+
+        span.entries = len(data["entries"])
+
+    text = io.StringIO(out.getvalue(), newline="" if fmt == "csv" else None)
+    parsed = read(text)
+    parsed["entries"] = profile.iterate("parse-input", parsed["entries"])
+
+    with profile.stage("encode"):
+        return api.rebuild(parsed, dedup_pool=True)
+
+
+def describe_difference(data, original, rebuilt, tags="ps2"):
+    """
+    Onde rebuilt deixou de ser igual a original: primeiro campo do header,
+    número de entradas, primeira entrada/campo ou, se tudo isso bate, o
+    primeiro byte diferente. None no Final Exam com header e entradas
+    iguais (só o layout do pool mudou).
+    """
+    try:
+        again = api.extract(rebuilt, game=data["game"], tags=tags)
+    except Exception as e:
+        return f"rebuilt file cannot be read back ({type(e).__name__}: {e})"
+
+    before = dict(header_fields(data))
+    after = dict(header_fields(again))
+
+    for key, value in before.items():
+        if after.get(key) != value:
+            return f"header {key}: {_show(value)} -> {_show(after.get(key))}"
+
+    entries, new_entries = data["entries"], again["entries"]
+
+    for i, (a, b) in enumerate(zip(entries, new_entries)):
+        if a != b:
+            field, old, new = _first_field(a, b)
+            return f"{_where(a, i)}: {field} {_show(old)} -> {_show(new)}"
+
+    if len(entries) != len(new_entries):
+        return f"{len(entries)} entries -> {len(new_entries)}"
+
+    if data["game"] == "finalexam":
+        return None
+
+    offset = next((i for i, (x, y) in enumerate(zip(original, rebuilt)) if x != y), min(len(original), len(rebuilt)))
+    return f"same entries, bytes differ at offset 0x{offset:X} ({len(original)} -> {len(rebuilt)} bytes)"
+
+
+def _first_field(a, b):
+    for key in type(a).FIELDS:
+        old, new = a.get(key), b.get(key)
+        if old == new:
+            continue
+
+        # Final Exam: aponta a sub-string
+        if key == "subs" and old is not None and new is not None:
+            for k, (x, y) in enumerate(zip(old, new)):
+                if x != y:
+                    return f"subs[{k}]", x, y
+            return "subs count", len(old), len(new)
+
+        return key, old, new
+
+    return "entry", dict(a), dict(b)
+
+
+def _where(e, i):
+    if "entry_index" in e:
+        return f"group {e['group_index']}, entry {e['entry_index']}"
+    return f"entry {e.get('index', i)}"
+
+
+def _show(value):
+    text = repr(value)
+    return text if len(text) <= SHOW_CHARS else text[:SHOW_CHARS - 3] + "..."
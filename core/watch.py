@@ -0,0 +1,173 @@
+# ==========================
+#         WATCH MODE
+# ==========================
+"""
+lngtool watch <dir>: refaz o .new.lng de cada .txt/.csv/.jsonl da pasta quando ele
+é salvo. A pasta é varrida a cada interval segundos (sem serviço do sistema)
+e um arquivo só é reconstruído depois de ficar debounce segundos sem mudar,
+então os vários writes de um "salvar" viram um rebuild só.
+
+O processo fica aberto e guarda o estado entre um rebuild e outro:
+- imports e tabelas já carregados;
+- as entradas já montadas de cada .txt (read_txt com memo): só os blocos
+  editados passam pelo parse de novo;
+- o .new.lng anterior serve de --base para o próximo rebuild (OB1/OB2):
+  só as entradas editadas desde o último save são codificadas de novo.
+
+Arquivos da pasta que não são fontes (um README.txt, um log) são pulados
+sem mensagem; só são lidos de novo quando mudam.
+"""
+import os
+import time
+
+from core.batch import _base_lng, rebuild_data
+from core.csv import read_csv
+from core.jsonl import read_jsonl
+from core.detect import detect_game
+from core.inputs import REBUILD_INPUTS, expand_inputs
+from core.txt import NotSourceError, read_txt
+
+# jogos em que o .new.lng anterior pode ser a base do patch. No Final Exam
+# o patch só anexa textos novos ao pool, que cresceria a cada save
+WARM_BASE_GAMES = ("ob1", "ob2")
+
+
+class Watcher:
+    def __init__(self, root, output_dir=None, interval=0.5, debounce=0.5,
+                 optimize_pool=False, tags=None, base=None, extend_glyphs=False):
+        self.root = root
+        self.output_dir = output_dir
+        self.interval = interval
+        self.debounce = debounce
+        self.options = {"optimize_pool": optimize_pool, "tags": tags, "extend_glyphs": extend_glyphs}
+        self.base = base
+
+        # fonte -> (mtime_ns, size) já reconstruído
+        self.built = {}
+        # fonte -> ((mtime_ns, size), quando mudou pela última vez)
+        self.pending = {}
+        # fonte .txt -> memo do read_txt
+        self.memo = {}
+
+    def output_path(self, path):
+        base = path.rsplit(".", 1)[0]
+        if self.output_dir:
+            # caminho relativo à pasta vigiada, como no batch
+            base = os.path.join(self.output_dir, os.path.relpath(base, self.root))
+        return base + ".new.lng"
+
+    def scan(self):
+        found = {}
+
+        for path in expand_inputs([self.root], REBUILD_INPUTS):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue  # apagado entre o walk e o stat
+            found[path] = (st.st_mtime_ns, st.st_size)
+
+        return found
+
+    def start(self):
+        """
+        Primeira varredura: marca como prontos os fontes cujo .new.lng já é
+        mais novo que eles; os outros entram na fila.
+        """
+        now = time.monotonic()
+
+        for path, sig in self.scan().items():
+            try:
+                up_to_date = os.stat(self.output_path(path)).st_mtime_ns >= sig[0]
+            except OSError:
+                up_to_date = False
+
+            if up_to_date:
+                self.built[path] = sig
+            else:
+                # sem esperar o debounce
+                self.pending[path] = (sig, now - self.debounce)
+
+    def poll(self):
+        """
+        Uma varredura. Devolve os fontes que mudaram e já estão estáveis.
+        """
+        now = time.monotonic()
+        found = self.scan()
+
+        for path in list(self.built):
+            if path not in found:
+                del self.built[path]
+                self.pending.pop(path, None)
+                self.memo.pop(path, None)
+
+        for path, sig in found.items():
+            if self.built.get(path) == sig:
+                self.pending.pop(path, None)
+                continue
+
+            seen = self.pending.get(path)
+            if seen is None or seen[0] != sig:
+                self.pending[path] = (sig, now)
+
+        ready = [p for p, (sig, since) in self.pending.items() if now - since >= self.debounce]
+        for path in ready:
+            del self.pending[path]
+
+        return [(path, found[path]) for path in ready]
+
+    def build(self, path, sig):
+        """
+        Reconstrói um fonte; devolve as mensagens do rebuild. Se falhar (ex.:
+        arquivo salvo pela metade), o fonte só é tentado de novo quando mudar.
+        NotSourceError se o arquivo não é um fonte do lngtool.
+        """
+        output = self.output_path(path)
+        self.built[path] = sig
+
+        if path.lower().endswith(".txt"):
+            with open(path, encoding="utf-8-sig") as f:
+                return self._rebuild(read_txt(f, memo=self.memo.setdefault(path, {})), path, output)
+
+        if path.lower().endswith(".jsonl"):
+            with open(path, encoding="utf-8-sig") as f:
+                return self._rebuild(read_jsonl(f), path, output)
+
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            return self._rebuild(read_csv(f), path, output)
+
+    def _rebuild(self, data, path, output):
+        base = _base_lng(self.base, path, self.root)
+
+        game = data["game"]
+        if game in WARM_BASE_GAMES and os.path.isfile(output) and detect_game(output) == game:
+            base = output
+
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        return rebuild_data(data, output, base=base, **self.options)
+
+    def run(self, log=print):
+        self.start()
+        log(f"[WATCH] {self.root} (Ctrl+C to stop)")
+
+        try:
+            while True:
+                for path, sig in self.poll():
+                    stamp = time.strftime("%H:%M:%S")
+                    t = time.perf_counter()
+
+                    try:
+                        messages = self.build(path, sig)
+                    except NotSourceError:
+                        continue
+                    except Exception as e:
+                        log(f"[ERRO] {stamp} {path}: {type(e).__name__}: {e}")
+                        continue
+
+                    log(f"[OK] {stamp} {path} ({(time.perf_counter() - t) * 1000:.0f} ms)")
+                    for message in messages:
+                        log(f"    {message}")
+
+                time.sleep(self.interval)
+
+        except KeyboardInterrupt:
+            log("[WATCH] stopped")
@@ -0,0 +1,49 @@
+# ==========================
+#      GAME REGISTRY
+# ==========================
+import importlib
+
+# jogo -> (módulo, {ação: função}); o módulo só é importado quando uma das
+# funções é pedida, então "detect" e arquivos de um jogo só não carregam os outros
+GAMES = {
+    "ob1": ("games.obscure1", {
+        "stream": "stream_ob1",
+        "extract": "extract_ob1",
+        "rebuild": "rebuild_ob1",
+        "patch": "patch_ob1",
+        "rebuild_bytes": "rebuild_ob1_bytes",
+        "patch_bytes": "patch_ob1_bytes",
+    }),
+    "ob2": ("games.obscure2", {
+        "stream": "stream_ob2",
+        "extract": "extract_ob2",
+        "rebuild": "rebuild_ob2",
+        "patch": "patch_ob2",
+        "rebuild_bytes": "rebuild_ob2_bytes",
+        "patch_bytes": "patch_ob2_bytes",
+    }),
+    "finalexam": ("games.final_exam", {
+        "stream": "stream_final_exam",
+        "extract": "extract_final_exam",
+        "rebuild": "rebuild_final_exam",
+        "patch": "patch_final_exam",
+        "rebuild_bytes": "rebuild_final_exam_bytes",
+        "patch_bytes": "patch_final_exam_bytes",
+    }),
+}
+
+ALIASES = {
+    "obscure1": "ob1",
+    "obscure2": "ob2",
+    "final_exam": "finalexam",
+}
+
+
+def get_handler(game, action):
+    game = ALIASES.get(game, game)
+
+    if game not in GAMES:
+        raise ValueError(f"jogo desconhecido: {game}")
+
+    module, actions = GAMES[game]
+    return getattr(importlib.import_module(module), actions[action])
@@ -1,5 +1,49 @@
-import struct
+import sys
+from array import array
+from bisect import bisect_right
 from io import BytesIO
+from itertools import accumulate
+
+from core import profile
+from core.entries import FinalExamEntry
+from core.layout import Layout, write_atomic
+from core.reader import open_lng, read_lng
+
+OFFSET_MASK = 0x1FFFF
+TAG_SHIFT = 17
+# a tag fica nos 15 bits de cima da palavra
+TAG_MAX = (1 << (32 - TAG_SHIFT)) - 1
+
+# ==========================
+#   LAYOUT (LITTLE-ENDIAN)
+# ==========================
+# header, glifos (glyph_count x u32), tabela (por entrada: sid, count e
+# count x sub), tamanho do pool, pool
+FE = Layout(
+    "<",
+    header=[("v1", "I"), ("magic", "I"), ("total_subs", "I"), ("entry_count", "I"), ("glyph_count", "I")],
+    entry=[("sid", "I"), ("count", "I")],
+    sub=[("tag_offset", "I"), ("unused", "I")],
+    pool_size=[("size", "I")],
+)
+
+# numpy é opcional e pesado de importar (~0.15 s): só vale para tabelas grandes
+NUMPY_MIN_WORDS = 1 << 16
+_np = False
+
+
+def _numpy():
+    global _np
+
+    if _np is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _np = numpy
+
+    return _np
+
 
 def parse_int(v):
     if isinstance(v, int):
@@ -12,156 +56,604 @@ def parse_int(v):
 # ==============================
 #     FINAL EXAM (EXTRACT)
 # ==============================      
-def extract_final_exam(path):
-    with open(path, "rb") as f:
-        data = f.read()
+def extract_final_exam(source):
+    """
+    source: caminho, bytes/bytearray/memoryview ou arquivo binário aberto.
+    """
+    data = stream_final_exam(source)
+    data["entries"] = list(data["entries"])
+    return data
+
 
-    pos = 0
+def stream_final_exam(source):
+    """
+    Igual a extract_final_exam, mas "entries" é um gerador. A tabela e o
+    índice do pool são lidos na hora; os textos, conforme as entradas são
+    pedidas. "warnings" vai sendo preenchida durante a iteração.
+    """
+    with profile.stage("read"):
+        buf = open_lng(source)
 
-    def read_u32():
-        nonlocal pos
-        val = struct.unpack_from("<I", data, pos)[0]
-        pos += 4
-        return val
+    try:
+        # header, tabela e índice do pool; os textos saem durante a iteração
+        with profile.stage("parse-table"):
+            data = _read_final_exam(buf)
+    except Exception:
+        buf.close()
+        raise
 
-    v1 = read_u32()
-    magic = read_u32()
-    total_subs = read_u32()
-    entry_count = read_u32()
-    glyph_count = read_u32()
+    data["entries"] = profile.iterate("parse-table", data["entries"])
+    return data
 
-    glyphs = [read_u32() for _ in range(glyph_count)]
 
-    entries = []
+def _read_final_exam(buf):
+    data = buf.view
+
+    v1, magic, total_subs, entry_count, glyph_count = FE.header.unpack_from(data, 0)
+    pos = FE.header.size
+
+    glyphs = list(FE.array("I", glyph_count).unpack_from(data, pos))
+    pos += 4 * glyph_count
 
     # ==============================
     # ENTRIES TABLE
     # ==============================
-    raw_entries = []
+    sids, counts, tags, offsets, pos = _unpack_sub_table(data, pos, entry_count, total_subs)
 
-    for i in range(entry_count):
-        sid = read_u32()
-        sub_count = read_u32()
+    # ==============================
+    # STRING BLOCK
+    # ==============================
+    data_size = FE.pool_size.unpack_from(data, pos)[0]
+    pos += FE.pool_size.size
+    str_end = min(pos + data_size, len(data))
+    pool_size = str_end - pos
 
-        subs = []
+    # um único scan de \0: offset inicial -> offset final de cada string
+    pool_starts, pool_ends = _scan_string_pool(buf.find, pos, str_end)
+    pool_index = dict(zip(pool_starts, pool_ends))
 
-        for _ in range(sub_count):
-            a = read_u32()
-            b = read_u32()
+    # offset -> (texto, problema); cada offset distinto é decodificado uma vez
+    cache = {}
+    warnings = []
 
-            offset = a & 0x1FFFF
-            tag = a >> 17
+    def read_string(offset):
+        hit = cache.get(offset)
+        if hit is not None:
+            return hit
 
-            subs.append((tag, offset))
+        kind = None
+        end = pool_index.get(offset)
 
-        raw_entries.append((sid, subs))
+        if end is None:
+            if offset >= pool_size:
+                hit = cache[offset] = ("", "out-of-range")
+                return hit
 
-    # ==============================
-    # STRING BLOCK
-    # ==============================
-    data_size = read_u32()
-    str_data = data[pos:pos + data_size]
+            # offset cai no meio de uma string: lê até o fim dela
+            # ("suffix" é normal em pools otimizados; "mid-char" corta um caractere UTF-8)
+            end = pool_ends[bisect_right(pool_starts, offset) - 1]
+            kind = "mid-char" if 0x80 <= data[pos + offset] < 0xC0 else "suffix"
 
-    def read_string(offset):
-        end = str_data.find(b"\x00", offset)
-        if end == -1:
-            end = len(str_data)
-        return str_data[offset:end].decode("utf-8", errors="replace")
+        hit = cache[offset] = (str(data[pos + offset:pos + end], "utf-8", "replace"), kind)
+        return hit
+
+    read_string = profile.wrap("decode-strings", read_string)
 
     # ==============================
     # BUILD FINAL STRUCT
     # ==============================
-    for i, (sid, subs) in enumerate(raw_entries):
-        texts = []
+    def iter_entries():
+        try:
+            starts = accumulate(counts, initial=0)
+
+            for i, (sid, start, n) in enumerate(zip(sids, starts, counts)):
+                texts = []
 
-        for tag, offset in subs:
-            text = read_string(offset)
-            texts.append((tag, text))
+                for tag, offset in zip(tags[start:start + n], offsets[start:start + n]):
+                    text, kind = read_string(offset)
+                    if kind is not None:
+                        warnings.append((i, tag, offset, kind))
+                    texts.append((tag, text))
 
-        entries.append({
-            "index": i,
-            "sid": sid,
-            "subs": texts
-        })
+                yield FinalExamEntry(i, sid, texts)
+        finally:
+            buf.close()
 
     return {
         "game": "finalexam",
         "v1": v1,
         "magic": magic,
         "glyphs": glyphs,
-        "entries": entries
+        "entries": iter_entries(),
+        "warnings": warnings
     }
 
 
+def _scan_string_pool(find, start, end):
+    """
+    Divide o pool em strings terminadas em \\0 (offsets relativos a start).
+    """
+    starts = []
+    ends = []
+    p = start
+
+    while p < end:
+        z = find(b"\x00", p, end)
+        if z == -1:
+            z = end
+        starts.append(p - start)
+        ends.append(z - start)
+        p = z + 1
+
+    return starts, ends
+
+
+# ==============================
+#     SUB-RECORD TABLE
+# ==============================
+# Layout (u32 LE): sid, sub_count, depois sub_count pares (a, b)
+#   a = tag << 17 | offset   (b sempre 0)
+# As funções abaixo trabalham em colunas: sids/counts por entrada e
+# tags/offsets planos; a entrada i usa tags[start:start + counts[i]].
+
+def _unpack_sub_table(data, pos, entry_count, total_subs):
+    words = (entry_count + total_subs) * 2
+
+    if pos + words * 4 > len(data) or array("I").itemsize != 4:
+        return _unpack_sub_table_scalar(data, pos, entry_count)
+
+    # leitura em bloco da tabela inteira
+    table = array("I")
+    table.frombytes(data[pos:pos + words * 4])
+    if sys.byteorder == "big":
+        table.byteswap()
+
+    # só os cabeçalhos (sid, count) precisam ser percorridos em sequência
+    sids = []
+    counts = []
+    heads = []
+    i = 0
+
+    for _ in range(entry_count):
+        if i + 2 > words:
+            break
+        sids.append(table[i])
+        n = table[i + 1]
+        counts.append(n)
+        heads.append(i)
+        i += 2 + 2 * n
+
+    if i != words or len(counts) != entry_count:
+        # total_subs do header não bate com a tabela
+        return _unpack_sub_table_scalar(data, pos, entry_count)
+
+    np = _numpy() if words >= NUMPY_MIN_WORDS else None
+
+    if np is not None:
+        keep = np.ones(words, dtype=bool)
+        heads = np.asarray(heads, dtype=np.int64)
+        keep[heads] = False
+        keep[heads + 1] = False
+        a = np.frombuffer(table, dtype=np.uint32)[keep][0::2]
+        tags = (a >> TAG_SHIFT).tolist()
+        offsets = (a & OFFSET_MASK).tolist()
+    else:
+        a = array("I")
+        for h, n in zip(heads, counts):
+            a += table[h + 2:h + 2 + 2 * n:2]
+        tags = [x >> TAG_SHIFT for x in a]
+        offsets = [x & OFFSET_MASK for x in a]
+
+    return sids, counts, tags, offsets, pos + words * 4
+
+
+def _unpack_sub_table_scalar(data, pos, entry_count):
+    sids = []
+    counts = []
+    tags = []
+    offsets = []
+
+    for _ in range(entry_count):
+        sid, n = FE.entry.unpack_from(data, pos)
+        pos += FE.entry.size
+
+        sids.append(sid)
+        counts.append(n)
+
+        for a, b in FE.sub.iter_unpack(data[pos:pos + n * FE.sub.size]):
+            tags.append(a >> TAG_SHIFT)
+            offsets.append(a & OFFSET_MASK)
+
+        pos += n * FE.sub.size
+
+    return sids, counts, tags, offsets, pos
+
+
+def _pack_sub_table(sids, counts, tags, offsets):
+    # conferido antes dos dois caminhos: o NumPy cortaria os bits a mais sem
+    # erro (tag 0x10000 viraria 0)
+    if tags and (min(tags) < 0 or max(tags) > TAG_MAX):
+        bad = next(t for t in tags if not 0 <= t <= TAG_MAX)
+        raise ValueError(f"tag 0x{bad:X} does not fit in {32 - TAG_SHIFT} bits (max 0x{TAG_MAX:X})")
+
+    if offsets and (min(offsets) < 0 or max(offsets) > OFFSET_MASK):
+        raise ValueError(f"Offset overflow ({TAG_SHIFT}-bit limit)")
+
+    n_entries = len(sids)
+    words = (n_entries + len(tags)) * 2
+    np = _numpy() if words >= NUMPY_MIN_WORDS else None
+
+    if np is not None:
+        counts_np = np.asarray(counts, dtype=np.int64)
+        heads = np.arange(n_entries, dtype=np.int64) * 2
+        heads[1:] += np.cumsum(counts_np[:-1] * 2)
+
+        table = np.zeros(words, dtype="<u4")
+        keep = np.ones(words, dtype=bool)
+        keep[heads] = False
+        keep[heads + 1] = False
+
+        table[heads] = sids
+        table[heads + 1] = counts_np
+        a = (np.asarray(tags, dtype="<u4") << TAG_SHIFT) | np.asarray(offsets, dtype="<u4")
+        table[np.flatnonzero(keep)[0::2]] = a
+
+        return table.tobytes()
+
+    subs = array("I", bytes(8 * len(tags)))
+    subs[0::2] = array("I", [(t << TAG_SHIFT) | o for t, o in zip(tags, offsets)])
+
+    table = array("I")
+    start = 0
+
+    for sid, n in zip(sids, counts):
+        table.append(sid)
+        table.append(n)
+        table += subs[start * 2:(start + n) * 2]
+        start += n
+
+    if sys.byteorder == "big":
+        table.byteswap()
+
+    return table.tobytes()
+
+
+# ==============================
+#        STRING POOL
+# ==============================
+def build_string_pool(texts, optimize=False, dedup=False):
+    """
+    Monta o bloco de strings (UTF-8 terminado em \\0) e devolve (pool, offsets).
+    optimize=True reaproveita strings repetidas e sufixos de outras strings
+    (tail merging): "Door" e "or" apontam para o mesmo lugar.
+    dedup=True (sem optimize) só reaproveita textos iguais, na ordem em que
+    aparecem: é o layout dos arquivos originais com offsets compartilhados.
+    """
+    encoded = [t.encode("utf-8", errors="replace") for t in texts]
+
+    if not optimize:
+        pool = BytesIO()
+        offsets = []
+        where = {}
+
+        for raw in encoded:
+            offset = where.get(raw) if dedup else None
+
+            if offset is None:
+                offset = pool.tell()
+                pool.write(raw)
+                pool.write(b"\x00")
+                if dedup:
+                    where[raw] = offset
+
+            offsets.append(offset)
+
+        return pool.getvalue(), offsets
+
+    # strings únicas na ordem em que aparecem
+    unique = list(dict.fromkeys(encoded))
+
+    # ordenando pelo texto invertido, quem é sufixo de outra string
+    # fica logo depois dela (ordem decrescente)
+    parent = {}
+    prev = None
+
+    for raw in sorted(unique, key=lambda b: b[::-1], reverse=True):
+        if prev is not None and prev.endswith(raw):
+            parent[raw] = parent.get(prev, prev)
+        prev = raw
+
+    pool = BytesIO()
+    where = {}
+
+    for raw in unique:
+        if raw not in parent:
+            where[raw] = pool.tell()
+            pool.write(raw)
+            pool.write(b"\x00")
+
+    for raw, root in parent.items():
+        where[raw] = where[root] + len(root) - len(raw)
+
+    return pool.getvalue(), [where[raw] for raw in encoded]
+
+
 # ==============================
 #     FINAL EXAM (REBUILD)
 # ==============================  
-def rebuild_final_exam(header, entries, out_path):
-
+def _collect_final_exam(header, entries):
+    """
+    Header e entradas do TXT/CSV -> (v1, magic, glyphs, sids, counts, tags, texts).
+    O header também pode ser o dict do extract (glyphs já como lista).
+    """
     v1 = parse_int(header.get("v1", 1))
     magic = parse_int(header.get("magic", 0))
 
     glyphs = []
-    glyph_str = header.get("glyphs", "").strip()
+    glyph_str = header.get("glyphs", "")
+
+    if not isinstance(glyph_str, str):
+        glyphs = [parse_int(g) for g in glyph_str]
 
-    if glyph_str:
+    elif glyph_str.strip():
         for g in glyph_str.split(","):
             g = g.strip()
             if g:
                 glyphs.append(parse_int(g))
 
-    data_stream = BytesIO()
-    sub_records = []
+    sids = []
+    counts = []
+    tags = []
+    texts = []
 
     # ==============================
     # BUILD STRING TABLE
     # ==============================
-    for e in sorted(entries, key=lambda x: int(x["index"])):
-        sid = parse_int(e.get("sid", 0))
+    for e in sorted(map(FinalExamEntry.coerce, entries), key=lambda x: int(x.index)):
+        sid = parse_int(e.sid)
         if sid is None:
-            raise Exception(f"Missing SID in entry index {e.get('index')}")
-        subs = e["subs"]
-
-        converted = []
+            raise Exception(f"Missing SID in entry index {e.index}")
+        subs = e.subs
 
         for tag, text in subs:
-            offset = data_stream.tell()
+            tags.append(tag)
+            texts.append(text)
+
+        sids.append(sid)
+        counts.append(len(subs))
+
+    return v1, magic, glyphs, sids, counts, tags, texts
+
 
-            data_stream.write(text.encode("utf-8", errors="replace"))
-            data_stream.write(b"\x00")
+# abaixo do espaço são controles (\n, \t, ...), que não passam pela fonte
+GLYPH_MIN = " "
 
-            if offset > 0x1FFFF:
-                raise Exception("Offset overflow (17-bit limit)")
 
-            converted.append((tag, offset))
+def check_glyphs(glyphs, sids, counts, texts):
+    """
+    Caracteres dos textos que não estão na tabela de glifos. Um conjunto com
+    os glifos e um com os caracteres de todos os textos: só as entradas que
+    usam algum caractere faltando são olhadas uma a uma.
+    Devolve [(sid, caracteres que faltam)] na ordem das entradas; vazio se
+    a tabela cobre tudo ou está vazia (nada para conferir).
+    """
+    if not glyphs:
+        return []
 
-        sub_records.append((sid, converted))
+    known = {chr(g) for g in glyphs if g <= sys.maxunicode}
+    missing = {c for c in set("".join(texts)) if c >= GLYPH_MIN} - known
 
-    str_data = data_stream.getvalue()
+    if not missing:
+        return []
+
+    report = []
+    start = 0
+
+    for sid, n in zip(sids, counts):
+        chars = set()
+
+        for text in texts[start:start + n]:
+            if not missing.isdisjoint(text):
+                chars.update(missing.intersection(text))
+
+        start += n
+        if chars:
+            report.append((sid, "".join(sorted(chars))))
+
+    return report
+
+
+def _cover_glyphs(glyphs, sids, counts, texts, extend_glyphs, stats):
+    """
+    check_glyphs para o rebuild/patch: registra em stats ("missing_glyphs",
+    "glyphs_added") e, com extend_glyphs, devolve a tabela com os glifos
+    que faltam no fim (em ordem de código).
+    """
+    missing = check_glyphs(glyphs, sids, counts, texts)
+    added = sorted({ord(c) for _, chars in missing for c in chars}) if extend_glyphs else []
+
+    if stats is not None:
+        stats["missing_glyphs"] = missing
+        stats["glyphs_added"] = len(added)
+
+    return glyphs + added if added else glyphs
+
+
+def rebuild_final_exam(header, entries, out_path, optimize_pool=False, stats=None, extend_glyphs=False):
+    """
+    stats (dict opcional) recebe pool_size / pool_size_plain para relatório
+    e missing_glyphs / glyphs_added (ver check_glyphs).
+    extend_glyphs: acrescenta à tabela de glifos os caracteres que faltam.
+    """
+    data = rebuild_final_exam_bytes(header, entries, optimize_pool, stats, extend_glyphs)
+
+    with profile.stage("write"):
+        write_atomic(out_path, data)
+
+    return out_path
+
+
+def rebuild_final_exam_bytes(header, entries, optimize_pool=False, stats=None, extend_glyphs=False,
+                             dedup_pool=False):
+    """
+    O .lng inteiro num bytearray, sem tocar no disco.
+    dedup_pool: textos iguais dividem o offset (ver build_string_pool).
+    """
+
+    v1, magic, glyphs, sids, counts, tags, texts = _collect_final_exam(header, entries)
+    glyphs = _cover_glyphs(glyphs, sids, counts, texts, extend_glyphs, stats)
+
+    str_data, offsets = build_string_pool(texts, optimize_pool, dedup_pool)
+
+    if offsets and max(offsets) > OFFSET_MASK:
+        raise Exception("Offset overflow (17-bit limit)")
+
+    if stats is not None:
+        stats["pool_size"] = len(str_data)
+        stats["pool_size_plain"] = sum(len(t.encode("utf-8", errors="replace")) + 1 for t in texts)
 
     # ==============================
-    # WRITE FILE
+    # BUILD FILE
     # ==============================
-    with open(out_path, "wb") as f:
-        f.write(struct.pack("<I", v1))
-        f.write(struct.pack("<I", magic))
-        f.write(struct.pack("<I", sum(len(s[1]) for s in sub_records)))
-        f.write(struct.pack("<I", len(sub_records)))
-        f.write(struct.pack("<I", len(glyphs)))
+    table = _pack_sub_table(sids, counts, tags, offsets)
 
-        for g in glyphs:
-            f.write(struct.pack("<I", g))
+    return _pack_final_exam(v1, magic, glyphs, len(tags), len(sids), table, str_data)
 
-        for sid, subs in sub_records:
-            f.write(struct.pack("<I", sid))
-            f.write(struct.pack("<I", len(subs)))
 
-            for tag, offset in subs:
-                a = (tag << 17) | offset
-                f.write(struct.pack("<I", a))
-                f.write(struct.pack("<I", 0))
+def _pack_final_exam(v1, magic, glyphs, total_subs, entry_count, table, *pool):
+    """
+    Monta o arquivo num bytearray do tamanho exato.
+    pool: pedaços do pool de strings, na ordem.
+    """
+    glyph_table = FE.array("I", len(glyphs))
+    pool_size = sum(len(p) for p in pool)
 
-        f.write(struct.pack("<I", len(str_data)))
-        f.write(str_data)
+    out = bytearray(FE.header.size + glyph_table.size + len(table) + FE.pool_size.size + pool_size)
 
-    return out_path
\ No newline at end of file
+    FE.header.pack_into(out, 0, v1, magic, total_subs, entry_count, len(glyphs))
+    pos = FE.header.size
+    glyph_table.pack_into(out, pos, *glyphs)
+    pos += glyph_table.size
+    out[pos:pos + len(table)] = table
+    pos += len(table)
+    FE.pool_size.pack_into(out, pos, pool_size)
+    pos += FE.pool_size.size
+
+    for part in pool:
+        out[pos:pos + len(part)] = part
+        pos += len(part)
+
+    return out
+
+
+# ==============================
+#     FINAL EXAM (PATCH)
+# ==============================
+def patch_final_exam(header, entries, base_path, out_path, stats=None, extend_glyphs=False):
+    """
+    Rebuild a partir do .lng original: o pool do original é mantido como está,
+    subs com o mesmo texto na mesma posição continuam no mesmo offset e só os
+    textos novos são codificados e anexados ao fim do pool. Sem mudanças, a
+    saída é idêntica ao original.
+    stats (dict opcional) recebe changed / total / pool_size e os glifos,
+    como no rebuild_final_exam.
+    """
+    data = patch_final_exam_bytes(header, entries, base_path, stats, extend_glyphs)
+
+    with profile.stage("write"):
+        write_atomic(out_path, data)
+
+    return out_path
+
+
+def patch_final_exam_bytes(header, entries, base, stats=None, extend_glyphs=False):
+    """
+    Igual a patch_final_exam, mas devolve o .lng em memória (o próprio
+    original, se nada mudou). base: o original como caminho, bytes/buffer
+    ou arquivo binário aberto.
+    """
+    v1, magic, glyphs, sids, counts, tags, texts = _collect_final_exam(header, entries)
+
+    # o original inteiro em memória: sem mudanças ele é a própria saída
+    with profile.stage("read"):
+        original = read_lng(base)
+        data = memoryview(original)
+
+        b_v1, b_magic, total_subs, entry_count, glyph_count = FE.header.unpack_from(data, 0)
+        b_glyphs = list(FE.array("I", glyph_count).unpack_from(data, FE.header.size))
+        b_sids, b_counts, b_tags, b_offsets, pos = _unpack_sub_table(
+            data, FE.header.size + 4 * glyph_count, entry_count, total_subs
+        )
+
+        data_size = FE.pool_size.unpack_from(data, pos)[0]
+        pos += FE.pool_size.size
+        pool = bytes(data[pos:min(pos + data_size, len(data))])
+        data.release()
+
+    # o CSV não traz v1/magic/glyphs: ficam os do original
+    if "v1" not in header:
+        v1 = b_v1
+    if "magic" not in header:
+        magic = b_magic
+    if "glyphs" not in header:
+        glyphs = b_glyphs
+
+    glyphs = _cover_glyphs(glyphs, sids, counts, texts, extend_glyphs, stats)
+
+    base_texts = {}
+
+    def base_text(offset):
+        text = base_texts.get(offset)
+        if text is None:
+            if offset >= len(pool):
+                text = ""
+            else:
+                end = pool.find(b"\x00", offset)
+                text = pool[offset:end if end != -1 else len(pool)].decode("utf-8", "replace")
+            base_texts[offset] = text
+        return text
+
+    # texto -> primeiro offset do original com esse texto
+    by_text = {}
+    for offset in b_offsets:
+        by_text.setdefault(base_text(offset), offset)
+
+    extra = bytearray()
+    offsets = []
+    changed = set()
+    entry_of = [i for i, n in enumerate(counts) for _ in range(n)]
+
+    for k, text in enumerate(texts):
+        if k < len(b_offsets) and base_text(b_offsets[k]) == text:
+            offsets.append(b_offsets[k])
+            continue
+
+        changed.add(entry_of[k])
+        offset = by_text.get(text)
+
+        if offset is None:
+            offset = by_text[text] = len(pool) + len(extra)
+            extra += text.encode("utf-8", errors="replace") + b"\x00"
+
+        offsets.append(offset)
+
+    for i, (sid, n) in enumerate(zip(sids, counts)):
+        if i >= len(b_sids) or b_sids[i] != sid or b_counts[i] != n:
+            changed.add(i)
+
+    if offsets and max(offsets) > OFFSET_MASK:
+        raise Exception("Offset overflow (17-bit limit); rebuild without --base")
+
+    if stats is not None:
+        stats["changed"] = len(changed)
+        stats["total"] = len(sids)
+        stats["pool_size"] = len(pool) + len(extra)
+
+    if (not extra and offsets == b_offsets and tags == b_tags and sids == b_sids
+            and counts == b_counts and glyphs == b_glyphs and v1 == b_v1 and magic == b_magic):
+        # nada mudou: cópia exata do original
+        return original
+
+    table = _pack_sub_table(sids, counts, tags, offsets)
+
+    return _pack_final_exam(v1, magic, glyphs, len(tags), len(sids), table, pool, extra)
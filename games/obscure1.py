@@ -1,4 +1,28 @@
-import struct
+import codecs
+import re
+from encodings.cp1252 import encoding_table as _CP1252_ENCODING
+
+from core import profile
+from core.entries import Ob1Entry
+from core.layout import Layout, write_atomic
+from core.reader import read_lng
+
+# decoders resolvidos uma vez (str(view, "cp1252") procura o codec a cada chamada)
+_decode_cp1252 = codecs.getdecoder("cp1252")
+_decode_utf16 = codecs.getdecoder("utf-16le")
+_charmap_encode = codecs.charmap_encode
+
+# ==========================
+#     LAYOUT (BIG-ENDIAN)
+# ==========================
+# text_len conta o byte de encoding, o param (só UTF-16), o texto e o
+# terminador ("\0" no cp1252, "\0\0" no UTF-16)
+OB1 = Layout(
+    ">",
+    header=[("languageCode", "I"), ("count", "I")],
+    entry=[("group", "H"), ("id", "H"), ("text_len", "I"), ("encoding", "B")],
+    entry_utf16=[("group", "H"), ("id", "H"), ("text_len", "I"), ("encoding", "B"), ("param", "B")],
+)
 
 # ==========================================
 # LÓGICA DE TRANSFORMAÇÃO DE TEXTO DO JOGO
@@ -13,156 +37,430 @@ OB1_BUTTON_TAGS = [
     ("À", "[Square]"),
     ("Ç", "[R2]"),
     ("Å", "[Start]"),
-    ("×︃", "[L2]"),
+    # 0xD7 no cp1252. Era "×︃" (com o seletor de variação U+FE03): isso nunca
+    # sai de um texto lido em cp1252 e no rebuild o U+FE03 virava "?"
+    ("×", "[L2]"),
     ("Ê", "[L3]"),
     ("õ", "[R3]"),
 ]
 
-def apply_ob1_tags(text):
-    for src, tag in OB1_BUTTON_TAGS:
-        text = text.replace(src, tag)
-    return text
+# Tabelas por plataforma; "raw" desliga a substituição. Xbox e Steam só
+# entram quando tiverem o mapeamento dos glifos da fonte delas.
+OB1_TAG_TABLES = {
+    "ps2": OB1_BUTTON_TAGS,
+    "raw": [],
+}
 
-def reverse_ob1_tags(text):
-    for src, tag in OB1_BUTTON_TAGS:
-        text = text.replace(tag, src)
-    return text
+_TAG_CODECS = {}
 
-# ==============================
-#     OBSCURE 1 (EXTRACT)
-# ==============================  
-def extract_ob1(path):
-    import struct
 
-    with open(path, "rb") as f:
-        data = f.read()
+def compile_ob1_tags(pairs):
+    """
+    Compila uma tabela (fonte, tag) em duas funções de passada única:
+    apply (jogo -> editor) e reverse (editor -> jogo).
+    Cada direção é uma única regex de alternância (sequências de vários
+    codepoints primeiro, depois uma classe com os caracteres simples), então
+    o resultado não depende da ordem da tabela. No extract o apply roda uma
+    vez sobre o texto de um bloco inteiro (decode_ob1_texts).
+    ValueError se algum glifo não existe no cp1252 (a tag não voltaria para
+    o .lng).
+    """
+    for src, tag in pairs:
+        try:
+            src.encode("cp1252")
+        except UnicodeEncodeError:
+            raise ValueError(f"OB1 tag {tag}: glyph {src!r} is not in cp1252") from None
 
-    pos = 0
+    forward = dict(pairs)
+    back = {tag: src for src, tag in pairs}
 
-    def r_u32():
-        nonlocal pos
-        if pos + 4 > len(data):
-            raise Exception(f"EOF u32 at {pos}")
-        v = struct.unpack_from(">I", data, pos)[0]
-        pos += 4
-        return v
+    def alternation(keys):
+        multi = sorted((k for k in keys if len(k) > 1), key=len, reverse=True)
+        single = "".join(k for k in keys if len(k) == 1)
+        parts = [re.escape(k) for k in multi]
+        if single:
+            parts.append("[" + re.escape(single) + "]")
+        return re.compile("|".join(parts)).sub
 
-    def r_u16():
-        nonlocal pos
-        if pos + 2 > len(data):
-            raise Exception(f"EOF u16 at {pos}")
-        v = struct.unpack_from(">H", data, pos)[0]
-        pos += 2
-        return v
+    if not pairs:
+        return (lambda text: text), (lambda text: text)
 
-    language_code = r_u32()
-    entry_count = r_u32()
+    forward_sub = alternation(forward)
+    back_sub = alternation(back)
+    forward_get = forward.__getitem__
+    back_get = back.__getitem__
 
-    entries = []
+    def apply_match(m):
+        return forward_get(m.group())
 
-    for i in range(entry_count):
+    def reverse_match(m):
+        return back_get(m.group())
 
-        if pos + 9 > len(data):
-            break  # evita crash hard
+    # atalhos para o caso comum (texto sem nada a trocar), sem rodar a regex:
+    # os glifos da fonte não são ASCII e as tags começam todas com "["
+    glyphs_ascii = any(k.isascii() for k in forward)
+    leads = {k[0] for k in back}
+    lead = leads.pop() if len(leads) == 1 else None
 
-        group = r_u16()
-        eid = r_u16()
-        text_len = r_u32()
+    def apply(text):
+        if not glyphs_ascii and text.isascii():
+            return text
+        return forward_sub(apply_match, text)
 
-        if text_len < 1 or text_len > 0x10000:
-            raise Exception(f"Invalid text_len {text_len} at {i}")
+    def reverse(text):
+        if lead is not None and lead not in text:
+            return text
+        return back_sub(reverse_match, text)
 
-        enc = struct.unpack_from("<B", data, pos)[0]
-        pos += 1
+    return apply, reverse
 
-        param = None
 
-        if enc == 1:
-            param = struct.unpack_from("<B", data, pos)[0]
-            pos += 1
+def get_ob1_tag_codec(platform="ps2"):
+    codec = _TAG_CODECS.get(platform)
 
-        header_size = 1 + (1 if enc == 1 else 0)
-        body_len = max(0, text_len - header_size)
+    if codec is None:
+        if platform not in OB1_TAG_TABLES:
+            raise ValueError(f"unknown OB1 tag table: {platform}")
+        codec = _TAG_CODECS[platform] = compile_ob1_tags(OB1_TAG_TABLES[platform])
 
-        if pos + body_len > len(data):
-            raise Exception(f"Overflow at entry {i}")
+    return codec
 
-        raw = data[pos:pos + body_len]
-        pos += body_len
 
-        if enc == 0:
-            text = apply_ob1_tags(
-                raw.split(b"\x00")[0].decode("cp1252", errors="ignore")
-            )
-        else:
-            text = raw.split(b"\x00\x00")[0].decode("utf-16le", errors="ignore")
+def apply_ob1_tags(text, platform="ps2"):
+    return get_ob1_tag_codec(platform)[0](text)
+
+def reverse_ob1_tags(text, platform="ps2"):
+    return get_ob1_tag_codec(platform)[1](text)
+
+# ==============================
+#     OBSCURE 1 (EXTRACT)
+# ==============================  
+def extract_ob1(source, tags="ps2"):
+    """
+    source: caminho, bytes/bytearray/memoryview ou arquivo binário aberto.
+    """
+    data = stream_ob1(source, tags)
+    data["entries"] = list(data["entries"])
+    return data
 
-        entries.append({
-            "index": i,
-            "group": group,
-            "id": eid,
-            "encoding": enc,
-            "param": param or 0,
-            "text": text
-        })
+
+def stream_ob1(source, tags="ps2"):
+    """
+    Igual a extract_ob1, mas "entries" é um gerador. A leitura é em blocos
+    de DECODE_CHUNK entradas: a tabela do bloco é percorrida guardando só
+    onde cada texto está, e os textos do bloco são decodificados todos de
+    uma vez (decode_ob1_texts).
+    """
+    apply_tags = get_ob1_tag_codec(tags)[0]
+
+    # bytes e não o mmap: fatiar bytes é bem mais rápido que a memoryview
+    with profile.stage("read"):
+        data = read_lng(source)
+
+    if len(data) < 8:
+        raise Exception("EOF u32 at 0")
+
+    language_code, entry_count = OB1.header.unpack_from(data, 0)
 
     return {
         "game": "ob1",
         "languageCode": language_code,
-        "entries": entries
+        "tags": tags,
+        "entries": profile.iterate("parse-table", _walk_ob1(data, entry_count, apply_tags))
     }
 
+
+# entradas por bloco: grande o bastante para o custo por chamada sumir,
+# pequeno o bastante para o extract continuar em fluxo
+DECODE_CHUNK = 4096
+
+
+def decode_ob1_texts(cp1252, utf16, apply_tags=None):
+    """
+    Decodifica os textos crus (já sem terminador) de várias entradas: todos
+    os cp1252 num decode só e todos os UTF-16 em outro, separados por \0
+    (que não aparece nos textos) e cortados de volta depois. apply_tags, se
+    dado, roda uma vez sobre o texto cp1252 inteiro.
+    Devolve (textos cp1252, textos UTF-16), cada um na ordem recebida.
+    """
+    text = _decode_cp1252(b"\x00".join(cp1252), "ignore")[0]
+    if apply_tags is not None:
+        with profile.stage("transform-tags"):
+            text = apply_tags(text)
+    cp1252 = text.split("\x00") if cp1252 else []
+
+    # byte sobrando no fim desalinharia os textos seguintes (sozinho ele
+    # também seria descartado pelo "ignore")
+    utf16 = [raw if not len(raw) & 1 else raw[:-1] for raw in utf16]
+    utf16 = _decode_utf16(b"\x00\x00".join(utf16), "ignore")[0].split("\x00") if utf16 else []
+
+    return cp1252, utf16
+
+
+def _find_utf16_end(data, pos, end):
+    # \0\0 só termina o texto numa posição par: em "AĀ" (41 00 00 01)
+    # o find acha \0\0 em pos + 1, no meio dos dois caracteres
+    stop = data.find(b"\x00\x00", pos, end)
+
+    while stop != -1 and (stop - pos) & 1:
+        stop = data.find(b"\x00\x00", stop + 1, end)
+
+    return end if stop == -1 else stop
+
+
+def _walk_ob1(data, entry_count, apply_tags):
+    unpack_entry = OB1.entry.unpack_from
+    find = data.find
+    size = len(data)
+    pos = OB1.header.size
+
+    for first in range(0, entry_count, DECODE_CHUNK):
+        # 1ª fase: só a tabela do bloco (cabeçalhos e onde está cada texto)
+        heads = []
+        cp1252 = []
+        utf16 = []
+        truncated = False
+
+        with profile.stage("parse-table"):
+            for i in range(first, min(first + DECODE_CHUNK, entry_count)):
+
+                if pos + OB1.entry.size > size:
+                    truncated = True
+                    break  # evita crash hard
+
+                group, eid, text_len, enc = unpack_entry(data, pos)
+                pos += OB1.entry.size
+
+                if text_len < 1 or text_len > 0x10000:
+                    raise Exception(f"Invalid text_len {text_len} at {i}")
+
+                param = 0
+
+                if enc == 1:
+                    param = data[pos]
+                    pos += 1
+
+                header_size = 1 + (1 if enc == 1 else 0)
+                body_len = max(0, text_len - header_size)
+
+                if pos + body_len > size:
+                    raise Exception(f"Overflow at entry {i}")
+
+                end = pos + body_len
+
+                if enc == 0:
+                    stop = find(b"\x00", pos, end)
+                    cp1252.append(data[pos:stop if stop != -1 else end])
+                else:
+                    utf16.append(data[pos:_find_utf16_end(data, pos, end)])
+
+                pos = end
+                heads.append((i, group, eid, enc, param))
+
+        # 2ª fase: os textos do bloco de uma vez
+        with profile.stage("decode-strings") as span:
+            span.entries = len(heads)
+            cp1252, utf16 = decode_ob1_texts(cp1252, utf16, apply_tags)
+
+        texts = (iter(cp1252), iter(utf16))
+
+        for index, group, eid, enc, param in heads:
+            yield Ob1Entry(index, group, eid, enc, param, next(texts[enc != 0]))
+
+        if truncated:
+            return
+
 # ==============================
 #     OBSCURE 1 (REBUILD)
 # ==============================  
-def rebuild_ob1(header, entries, out_path):
-    import struct
-    from io import BytesIO
-    import os
+def _encode_ob1_body(text, enc, reverse_tags):
+    # enc 0: cp1252 com os glifos de botão; enc 1: UTF-16 LE
+    if enc == 1:
+        return text.encode("utf-16-le", errors="replace")
+
+    text = reverse_tags(text)
+    # ASCII: cp1252 == UTF-8 e o codec é em C; o resto direto no charmap
+    if text.isascii():
+        return text.encode()
+    return _charmap_encode(text, "replace", _CP1252_ENCODING)[0]
+
+
+def rebuild_ob1(header, entries, out_path, tags=None):
+    data = rebuild_ob1_bytes(header, entries, tags)
 
-    cp1252 = __import__("codecs").getencoder("cp1252")
+    with profile.stage("write"):
+        write_atomic(out_path, data)
 
+    return out_path
+
+
+def rebuild_ob1_bytes(header, entries, tags=None):
+    """
+    O .lng inteiro num bytearray, sem tocar no disco.
+    """
     v = int(header.get("languageCode", 0))
 
+    # tabela do header do TXT ("tags = ps2") ou a passada pela CLI
+    reverse_tags = profile.wrap("transform-tags", get_ob1_tag_codec(tags or header.get("tags") or "ps2")[1])
+
     # ordena
     entries = sorted(
-        entries,
-        key=lambda e: int(e.get("index", 0))
+        map(Ob1Entry.coerce, entries),
+        key=lambda e: int(e.index)
     )
 
-    fs = BytesIO()
-
-    fs.write(struct.pack("<I", v))
-    fs.write(struct.pack("<I", len(entries)))
+    # 1ª passada: codifica os textos e soma o tamanho exato do arquivo
+    records = []
+    size = OB1.header.size
+    utf16 = 0
 
     for e in entries:
-        group = int(e["group"])
-        eid = int(e["id"])
-        enc = int(e["encoding"])
-        param = int(e.get("param", 0))
+        enc = int(e.encoding)
+        body = _encode_ob1_body(e.text, enc, reverse_tags)
+        records.append((int(e.group), int(e.id), enc, int(getattr(e, "param", 0)), body))
+        size += len(body)
+        utf16 += enc == 1
 
-        text = e["text"]
+    # cabeçalho + terminador: 9 + 1 no cp1252, 10 + 2 no UTF-16
+    size += (OB1.entry.size + 1) * (len(records) - utf16) + (OB1.entry_utf16.size + 2) * utf16
 
-        fs.write(struct.pack("<H", group))
-        fs.write(struct.pack("<H", eid))
+    # 2ª passada: tudo num bytearray só (já zerado: os terminadores estão lá)
+    out = bytearray(size)
+    OB1.header.pack_into(out, 0, v, len(records))
+    pos = OB1.header.size
 
-        encoded = text.encode("cp1252", errors="ignore")
+    pack_entry = OB1.entry.pack_into
+    pack_utf16 = OB1.entry_utf16.pack_into
 
-        text_len = 1 + len(encoded) + (1 if enc == 1 else 0)
+    entry_size = OB1.entry.size
+    utf16_size = OB1.entry_utf16.size
 
-        fs.write(struct.pack("<I", text_len))
-        fs.write(struct.pack("<B", enc))
+    for group, eid, enc, param, body in records:
+        n = len(body)
 
         if enc == 1:
-            fs.write(struct.pack("<B", param))
+            pack_utf16(out, pos, group, eid, n + 4, enc, param)
+            pos += utf16_size
+            out[pos:pos + n] = body
+            pos += n + 2
+        else:
+            pack_entry(out, pos, group, eid, n + 2, enc)
+            pos += entry_size
+            out[pos:pos + n] = body
+            pos += n + 1
+
+    return out
+
+
+# ==============================
+#     OBSCURE 1 (PATCH)
+# ==============================
+def patch_ob1(header, entries, base_path, out_path, tags=None, stats=None):
+    """
+    Rebuild a partir do .lng original: entradas com texto e campos iguais aos
+    do original têm o registro copiado byte a byte; só as alteradas são
+    codificadas de novo (na mesma ordem de bytes do original). Sem mudanças,
+    a saída é idêntica ao original.
+    stats (dict opcional) recebe changed / total.
+    """
+    data = patch_ob1_bytes(header, entries, base_path, tags, stats)
+
+    with profile.stage("write"):
+        write_atomic(out_path, data)
+
+    return out_path
+
+
+def patch_ob1_bytes(header, entries, base, tags=None, stats=None):
+    """
+    Igual a patch_ob1, mas devolve o bytearray. base: o original como
+    caminho, bytes/buffer ou arquivo binário aberto.
+    """
+    apply_tags, reverse_tags = get_ob1_tag_codec(tags or header.get("tags") or "ps2")
+    reverse_tags = profile.wrap("transform-tags", reverse_tags)
+
+    entries = sorted(map(Ob1Entry.coerce, entries), key=lambda e: int(e.index))
 
-        fs.write(encoded)
+    # bytes e não memoryview: comparar fatias de bytes é bem mais rápido
+    with profile.stage("read"):
+        data = read_lng(base)
 
-    base = out_path.replace(".new", "")
-    base = os.path.splitext(base)[0]
-    out = base + ".new.lng"
+    if len(data) < 8:
+        raise Exception("EOF u32 at 0")
+
+    unpack_head = OB1.entry.unpack_from
+    size = len(data)
+
+    language_code, base_count = OB1.header.unpack_from(data, 0)
+    out = bytearray(OB1.header.pack(int(header.get("languageCode", language_code)), len(entries)))
+    changed = 0
+
+    # o original é percorrido junto com as entradas, em ordem de índice
+    base_i = 0
+    pos = OB1.header.size
+
+    for e in entries:
+        i = int(e.index)
+
+        while base_i < i and base_i < base_count and pos + 9 <= size:
+            pos += 8 + unpack_head(data, pos)[2]
+            base_i += 1
+
+        old = None
+        if base_i == i and base_i < base_count and pos + 9 <= size:
+            old = unpack_head(data, pos)
+
+        group = int(e.group)
+        eid = int(e.id)
+        enc = int(e.encoding)
+
+        # o CSV não tem a coluna param: fica a do original
+        if hasattr(e, "param") or old is None or old[3] != 1:
+            param = int(getattr(e, "param", 0))
+        else:
+            param = data[pos + 9]
+
+        if enc != 1:
+            param = 0
+
+        text = e.text
+        encoded = _encode_ob1_body(text, enc, reverse_tags)
+
+        if old is not None and old[:2] == (group, eid) and old[3] == enc:
+            start = pos
+            end = pos + 8 + old[2]
+            body = start + 9
+
+            if enc == 1:
+                same_param = data[body] == param
+                body += 1
+                stop = _find_utf16_end(data, body, end)
+            else:
+                same_param = True
+                stop = data.find(b"\x00", body, end)
+                if stop == -1:
+                    stop = end
+
+            raw = data[body:stop]
+
+            # compara em bytes; só decodifica se diferir
+            if same_param and (raw == encoded or (
+                    _decode_utf16(raw, "ignore")[0] if enc == 1
+                    else apply_tags(_decode_cp1252(raw, "ignore")[0])) == text):
+                out += data[start:end]
+                continue
+
+        changed += 1
+
+        if enc == 1:
+            out += OB1.entry_utf16.pack(group, eid, len(encoded) + 4, enc, param)
+            out += encoded + b"\x00\x00"
+        else:
+            out += OB1.entry.pack(group, eid, len(encoded) + 2, enc)
+            out += encoded + b"\x00"
 
-    with open(out, "wb") as f:
-        f.write(fs.getvalue())
+    if stats is not None:
+        stats["changed"] = changed
+        stats["total"] = len(entries)
 
-    return out
\ No newline at end of file
+    return out
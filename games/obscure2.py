@@ -1,7 +1,50 @@
-import struct
+import codecs
+from array import array
+from encodings.cp1252 import encoding_table as _CP1252_ENCODING
+
+from core import profile
+from core.entries import Ob2Entry
+from core.layout import Layout, write_atomic
+from core.reader import read_lng
 
 CP1252 = "cp1252"
 
+_decode_cp1252 = codecs.getdecoder(CP1252)
+_charmap_encode = codecs.charmap_encode
+
+
+def _encode_cp1252(text):
+    # ASCII é igual em cp1252 e UTF-8 (codec em C); o resto vai direto para
+    # o charmap, sem passar pelo encodings.cp1252 em Python
+    if text.isascii():
+        return text.encode()
+    return _charmap_encode(text, "replace", _CP1252_ENCODING)[0]
+
+
+def _text_encoder(header):
+    """
+    Codificador das entradas: o "encoding" da entrada (arquivo misto) ou o
+    do arquivo; UTF-8 só quando um dos dois diz, senão cp1252 (o editor).
+    """
+    default = header.get("encoding")
+
+    def encode(e):
+        if getattr(e, "encoding", default) == "utf-8":
+            return e.text.encode("utf-8", errors="replace")
+        return _encode_cp1252(e.text)
+
+    return encode
+
+# ==========================
+#   LAYOUT (LITTLE-ENDIAN)
+# ==========================
+OB2 = Layout(
+    "<",
+    header=[("languageCode", "I"), ("groupCount", "I")],
+    group=[("group_id", "I"), ("entryCount", "I")],
+    entry=[("meta", "I"), ("length", "I")],
+)
+
 
 # =========================
 #     SMART DECODER
@@ -12,118 +55,448 @@ def smart_decode(raw: bytes) -> str:
     O editor oficial aparentemente tolera ambos.
     """
 
-    raw = raw.split(b"\x00")[0]
+    return _decode_hybrid(raw.split(b"\x00")[0])
+
+
+def _decode_hybrid(raw: bytes) -> str:
+    # bytes já cortados no \x00
+
+    # a maioria das strings é ASCII: igual nos dois, sem tentativa
+    if raw.isascii():
+        return raw.decode("ascii")
 
     # tenta UTF-8 primeiro (corrige casos tipo C3 88 = È)
     try:
-        text = raw.decode("utf-8")
+        text = str(raw, "utf-8")
         if "�" not in text:
             return text
     except UnicodeDecodeError:
         pass
 
     # fallback CP1252
-    return raw.decode(CP1252, errors="replace")
+    return _decode_cp1252(raw, "replace")[0]
+
+
+def decode_texts(raws):
+    """
+    Decodifica todos os textos crus de um arquivo (o que vem depois do
+    primeiro \x00 de cada um é ignorado, como no smart_decode) escolhendo o
+    codec uma vez para o arquivo inteiro.
+    Devolve (encoding, textos, índices das entradas lidas como cp1252):
+
+        "ascii"   tudo ASCII: um decode só
+        "utf-8"   o arquivo inteiro é UTF-8 válido: um decode só
+        "cp1252"  nenhuma entrada não-ASCII é UTF-8: um decode só
+        "mixed"   UTF-8 e cp1252 misturados: só as entradas que falham no
+                  UTF-8 são refeitas em cp1252 (e voltam na lista)
+
+    O resultado é o mesmo de chamar smart_decode em cada entrada.
+    """
+    if not raws:
+        return "ascii", [], []
+
+    joined = _join_raws(raws)
+    encoding, fixes = _classify_block(joined)
+
+    return encoding, _decode_block(joined, encoding, fixes), list(fixes)
+
+
+def _join_raws(raws):
+    # \x00 separa os textos: é ASCII nos três codecs. Se algum texto já tem
+    # o seu (terminador), corta ali antes
+    joined = b"\x00".join(raws)
+    if joined.count(0) != len(raws) - 1:
+        joined = b"\x00".join([raw.partition(b"\x00")[0] for raw in raws])
+    return joined
+
+
+def _classify_block(joined):
+    """
+    Encoding de um bloco de textos crus separados por \x00 (_join_raws),
+    o mesmo do decode_texts, sem guardar texto nenhum. Devolve (encoding,
+    índices das entradas que falham no UTF-8); a lista só tem algo no
+    "mixed" (no "cp1252" elas são todas as não-ASCII).
+    """
+    if joined.isascii():
+        return "ascii", ()
+
+    # um decode só com "replace": \x00 nunca entra numa sequência inválida,
+    # então cada texto continua separado, e os que têm "�" são exatamente
+    # os que o smart_decode mandaria para o cp1252
+    texts = str(joined, "utf-8", "replace").split("\x00")
+    fixes = [i for i, t in enumerate(texts) if "�" in t]
+
+    if not fixes:
+        return "utf-8", ()
+
+    if not any(not t.isascii() and "�" not in t for t in texts):
+        return "cp1252", ()
+
+    return "mixed", fixes
+
+
+def _decode_block(joined, encoding, fixes=()):
+    # o bloco -> lista de textos, com o encoding do _classify_block
+    if encoding == "ascii":
+        return joined.decode("ascii").split("\x00")
+
+    if encoding == "cp1252":
+        return _decode_cp1252(joined, "replace")[0].split("\x00")
+
+    texts = str(joined, "utf-8", "replace").split("\x00")
+
+    if fixes:
+        raws = joined.split(b"\x00")
+        for i in fixes:
+            texts[i] = _decode_cp1252(raws[i], "replace")[0]
+
+    return texts
+
+
+def _file_encoding(encodings):
+    # encoding do arquivo a partir do de cada bloco
+    encodings = set(encodings) - {"ascii"}
+    if not encodings:
+        return "ascii"
+    if len(encodings) == 1:
+        return encodings.pop()
+    return "mixed"
 
 
 # =========================
 #        EXTRACT
 # =========================
-def extract_ob2(path):
-    with open(path, "rb") as f:
-        data = f.read()
+def extract_ob2(source):
+    """
+    source: caminho, bytes/bytearray/memoryview ou arquivo binário aberto.
+    """
+    data = stream_ob2(source)
+    data["entries"] = list(data["entries"])
+    return data
 
-    pos = 0
 
-    def u32():
-        nonlocal pos
-        v = struct.unpack_from("<I", data, pos)[0]
-        pos += 4
-        return v
+# entradas por bloco, como no Obscure 1
+DECODE_CHUNK = 4096
 
-    languageCode = u32()
-    groupCount = u32()
 
-    entries = []
+def stream_ob2(source):
+    """
+    Igual a extract_ob2, mas "entries" é um gerador. A tabela é percorrida
+    na abertura em blocos de DECODE_CHUNK entradas guardando os textos crus
+    de cada bloco e o encoding dele (_classify_block), sem decodificar nada;
+    cada bloco só é decodificado (_decode_block) quando a iteração chega
+    nele. Assim "encoding" (codec do arquivo) e "fallback" ((group_index,
+    entry_index) das entradas lidas como cp1252 num arquivo misto) já vêm
+    preenchidos.
+    Num arquivo misto, as entradas não-ASCII lidas como UTF-8 têm
+    encoding = "utf-8".
+    """
+    # bytes e não o mmap: fatiar bytes é ~3x mais rápido que fatiar a
+    # memoryview. O arquivo só é usado aqui; a iteração usa os blocos
+    with profile.stage("read"):
+        data = read_lng(source)
+
+    # as entradas da tabela são contadas quando o gerador é consumido
+    with profile.stage("parse-table"):
+        languageCode, groupCount = OB2.header.unpack_from(data, 0)
+        groups, metas, blocks, fallback = _walk_ob2(data, groupCount)
+
+    del data
+    encoding = _file_encoding(block[0] for block in blocks)
+
+    return {
+        "game": "ob2",
+        "languageCode": languageCode,
+        "encoding": encoding,
+        "fallback": _entry_keys(groups, fallback) if encoding == "mixed" else [],
+        "entries": profile.iterate("parse-table", _iter_ob2(groups, metas, blocks, encoding == "mixed"))
+    }
+
+
+def _walk_ob2(data, groupCount):
+    """
+    Percorre a tabela: [(group_id, entryCount)], metas, os blocos
+    ([(encoding, textos crus separados por \x00, índices que falham no
+    UTF-8)], ver _classify_block) e os índices (na ordem do arquivo) das
+    entradas que o smart_decode leria como cp1252.
+    """
+    groups = []
+    metas = array("I")
+    blocks = []
+    fallback = array("I")
+    raws = []
+    add_meta = metas.append
+    add_raw = raws.append
+
+    unpack_group = OB2.group.unpack_from
+    unpack_entry = OB2.entry.unpack_from
+    size = len(data)
+    pos = OB2.header.size
+
+    def flush():
+        first = len(metas) - len(raws)
+        joined = _join_raws(raws)
+
+        # só o encoding: o texto é jogado fora e refeito na iteração
+        with profile.stage("decode-strings"):
+            encoding, fixes = _classify_block(joined)
+
+        if encoding == "mixed":
+            fallback.extend(first + i for i in fixes)
+        elif encoding == "cp1252":
+            fallback.extend(first + i for i, raw in enumerate(joined.split(b"\x00")) if not raw.isascii())
+
+        blocks.append((encoding, joined, fixes))
+        raws.clear()
 
     for g in range(groupCount):
-        groupId = u32()
-        entryCount = u32()
+        groupId, entryCount = unpack_group(data, pos)
+        pos += OB2.group.size
+        groups.append((groupId, entryCount))
 
         for e in range(entryCount):
-            meta = u32()
-            length = u32()
+            meta, length = unpack_entry(data, pos)
+            pos += OB2.entry.size
+            end = pos + length
 
-            text = ""
+            add_meta(meta)
+            add_raw(data[pos:end] if end <= size else b"")
+            pos = end
 
-            if length > 0 and pos + length <= len(data):
-                raw = data[pos:pos + length]
-                pos += length
+            if len(raws) == DECODE_CHUNK:
+                flush()
 
-                # 🔥 FIX PRINCIPAL: decoder híbrido
-                text = smart_decode(raw)
+    if raws:
+        flush()
 
-            else:
-                pos += length
+    return groups, metas, blocks, fallback
 
-            entries.append({
-                "group_index": g,
-                "group_id": groupId,
-                "entry_index": e,
-                "meta": meta,
-                "text": text
-            })
 
-    return {
-        "game": "ob2",
-        "languageCode": languageCode,
-        "entries": entries
-    }
+def _iter_ob2(groups, metas, blocks, mixed=False):
+    """
+    Monta as entradas bloco a bloco. mixed: arquivo misto, as não-ASCII
+    lidas como UTF-8 levam encoding = "utf-8".
+    """
+    # (group_index, group_id, entry_index) de cada entrada, na ordem do arquivo
+    keys = ((g, groupId, e) for g, (groupId, entryCount) in enumerate(groups) for e in range(entryCount))
+    metas = iter(metas)
+
+    for encoding, joined, fixes in blocks:
+        with profile.stage("decode-strings") as span:
+            texts = _decode_block(joined, encoding, fixes)
+            span.entries = len(texts)
+
+        # o zip para no fim do bloco sem consumir keys/metas a mais
+        if mixed and encoding in ("utf-8", "mixed"):
+            fixes = set(fixes)
+            for i, (text, (g, groupId, e), meta) in enumerate(zip(texts, keys, metas)):
+                yield Ob2Entry(g, groupId, e, meta, text, "utf-8" if i not in fixes and not text.isascii() else None)
+        else:
+            for text, (g, groupId, e), meta in zip(texts, keys, metas):
+                yield Ob2Entry(g, groupId, e, meta, text, None)
+
+
+def _entry_keys(groups, indices):
+    # índices na ordem do arquivo -> (group_index, entry_index)
+    keys = []
+    indices = iter(indices)
+    i = next(indices, None)
+    start = 0
+
+    for g, (_, entryCount) in enumerate(groups):
+        while i is not None and i < start + entryCount:
+            keys.append((g, i - start))
+            i = next(indices, None)
+        start += entryCount
+
+    return keys
 
 
 # =========================
 #        REBUILD
 # =========================
-def rebuild_ob2(header, entries, out_path):
-    languageCode = int(header.get("languageCode", 0))
-
+def _group_ob2(entries):
     groups = {}
 
-    for e in entries:
-        g = int(e["group_index"])
+    for e in map(Ob2Entry.coerce, entries):
+        g = int(e.group_index)
 
         if g not in groups:
             groups[g] = {
-                "group_id": int(e["group_id"]),
+                "group_id": int(e.group_id),
                 "entries": {}
             }
 
-        groups[g]["entries"][int(e["entry_index"])] = e
+        groups[g]["entries"][int(e.entry_index)] = e
+
+    return groups
+
+
+def rebuild_ob2(header, entries, out_path):
+    data = rebuild_ob2_bytes(header, entries)
+
+    with profile.stage("write"):
+        write_atomic(out_path, data)
+
+    return out_path
+
+
+def rebuild_ob2_bytes(header, entries):
+    """
+    O .lng inteiro num bytearray, sem tocar no disco.
+    """
+    languageCode = int(header.get("languageCode", 0))
+    encode = _text_encoder(header)
+
+    groups = _group_ob2(entries)
+
+    # 1ª passada: codifica os textos e soma o tamanho exato do arquivo
+    # (índices que faltam num grupo viram entradas vazias)
+    table = []
+    size = OB2.header.size
+
+    for g in sorted(groups.keys()):
+        group = groups[g]
+        entry_dict = group["entries"]
+        count = max(entry_dict.keys()) + 1 if entry_dict else 0
+
+        metas = [0] * count
+        bodies = [b""] * count
+
+        for i, e in entry_dict.items():
+            metas[i] = int(e.meta)
+            bodies[i] = encode(e)
+
+        table.append((group["group_id"], metas, bodies))
+        size += OB2.group.size + OB2.entry.size * count + sum(map(len, bodies))
+
+    # 2ª passada: tudo num bytearray só
+    out = bytearray(size)
+    OB2.header.pack_into(out, 0, languageCode, len(table))
+    pos = OB2.header.size
+
+    pack_group = OB2.group.pack_into
+    pack_entry = OB2.entry.pack_into
+    entry_size = OB2.entry.size
+
+    for group_id, metas, bodies in table:
+        pack_group(out, pos, group_id, len(bodies))
+        pos += OB2.group.size
+
+        for meta, body in zip(metas, bodies):
+            pack_entry(out, pos, meta, len(body))
+            pos += entry_size
+            end = pos + len(body)
+            out[pos:end] = body
+            pos = end
+
+    return out
+
+
+# =========================
+#         PATCH
+# =========================
+def patch_ob2(header, entries, base_path, out_path, stats=None):
+    """
+    Rebuild a partir do .lng original: entradas com meta e texto iguais aos
+    do original têm o registro copiado byte a byte; só as alteradas são
+    codificadas de novo. Sem mudanças, a saída é idêntica ao original.
+    stats (dict opcional) recebe changed / total.
+    """
+    data = patch_ob2_bytes(header, entries, base_path, stats)
+
+    with profile.stage("write"):
+        write_atomic(out_path, data)
+
+    return out_path
+
+
+def patch_ob2_bytes(header, entries, base, stats=None):
+    """
+    Igual a patch_ob2, mas devolve o bytearray. base: o original como
+    caminho, bytes/buffer ou arquivo binário aberto.
+    """
+    groups = _group_ob2(entries)
+    encode = _text_encoder(header)
+
+    # bytes e não memoryview: comparar fatias de bytes é bem mais rápido
+    with profile.stage("read"):
+        data = read_lng(base)
+
+    # grupo e entrada têm o mesmo formato (dois u32)
+    unpack_pair = OB2.entry.unpack_from
+    size = len(data)
+
+    languageCode, groupCount = OB2.header.unpack_from(data, 0)
+    languageCode = int(header.get("languageCode", languageCode))
+
+    out = bytearray(OB2.header.pack(languageCode, len(groups)))
+    changed = 0
+    total = 0
+
+    # o original é percorrido junto com os grupos editados, em ordem
+    base_g = 0
+    base_pos = 8
+
+    def skip_group(pos):
+        count = unpack_pair(data, pos)[1]
+        pos += 8
+        for _ in range(count):
+            pos += 8 + unpack_pair(data, pos)[1]
+        return pos
+
+    for g in sorted(groups.keys()):
+        group = groups[g]
+        entry_dict = group["entries"]
+        max_e = max(entry_dict.keys()) if entry_dict else -1
+
+        out += OB2.group.pack(group["group_id"], max_e + 1)
+
+        while base_g < g and base_g < groupCount and base_pos + 8 <= size:
+            base_pos = skip_group(base_pos)
+            base_g += 1
+
+        if base_g == g and base_g < groupCount and base_pos + 8 <= size:
+            base_count = unpack_pair(data, base_pos)[1]
+            pos = base_pos + 8
+        else:
+            base_count = 0
+            pos = size
+
+        for i in range(max_e + 1):
+            start = pos
+
+            if i < base_count and start + 8 <= size:
+                old_meta, length = unpack_pair(data, start)
+                pos = end = start + 8 + length
+            else:
+                start = None
+
+            e = entry_dict.get(i)
 
-    with open(out_path, "wb") as f:
-        f.write(struct.pack("<I", languageCode))
-        f.write(struct.pack("<I", len(groups)))
+            if e is None:
+                out += OB2.entry.pack(0, 0)
+                continue
 
-        for g in sorted(groups.keys()):
-            group = groups[g]
-            f.write(struct.pack("<I", group["group_id"]))
+            total += 1
+            meta = int(e.meta)
+            text = e.text
+            text_bytes = encode(e)
 
-            entry_dict = group["entries"]
-            max_e = max(entry_dict.keys()) if entry_dict else -1
+            if start is not None and old_meta == meta:
+                raw = data[start + 8:end].split(b"\x00", 1)[0]
 
-            f.write(struct.pack("<I", max_e + 1))
+                # compara em bytes; só decodifica se diferir (entradas UTF-8)
+                if raw == text_bytes or _decode_hybrid(raw) == text:
+                    out += data[start:end]
+                    continue
 
-            for i in range(max_e + 1):
-                if i in entry_dict:
-                    e = entry_dict[i]
-                    meta = int(e["meta"])
+            changed += 1
+            out += OB2.entry.pack(meta, len(text_bytes))
+            out += text_bytes
 
-                    # 🔥 FIX: mantém comportamento do editor (CP1252 tolerante)
-                    text_bytes = e["text"].encode("cp1252", errors="replace")
-                else:
-                    meta = 0
-                    text_bytes = b""
+    if stats is not None:
+        stats["changed"] = changed
+        stats["total"] = total
 
-                f.write(struct.pack("<I", meta))
-                f.write(struct.pack("<I", len(text_bytes)))
-                f.write(text_bytes)
\ No newline at end of file
+    return out
@@ -1,19 +1,218 @@
+import os
 import sys
 import argparse
-from core.detect import detect_game
-from games.final_exam import extract_final_exam, rebuild_final_exam
-from games.obscure1 import extract_ob1, rebuild_ob1
-from games.obscure2 import extract_ob2, rebuild_ob2
-from core.txt import export_txt, parse_txt
-from core.csv import export_csv, parse_csv
+
+# só o necessário para montar o parser; o resto é importado pelo comando
+# que vai rodar (detect não carrega batch, cache, csv, ...)
+
+
+# ======================
+#        COMMANDS
+# ======================
+def run_detect(args):
+    from core.detect import best_game, sniff, sniff_data
+    from core.inputs import expand_inputs
+
+    paths = expand_inputs(args.input, (".lng",))
+    if not paths:
+        print("[ERRO] no input files found")
+        sys.exit(1)
+
+    # core.archive (zipfile) só quando algum caminho é membro de um .zip
+    archive = None
+    if any(".zip" in path.lower() for path in paths):
+        from core import archive
+
+    single = len(paths) == 1
+    failed = 0
+
+    for path in paths:
+        try:
+            found = sniff_data(archive.read_member(path)) if archive and archive.split_member(path) else sniff(path)
+        except (OSError, KeyError) as e:
+            failed += 1
+            print(f"[ERRO] {path}: {e}")
+            continue
+
+        game = best_game(found)
+        print(game if single else f"{path}: {game}")
+
+        # arquivo que o extract não sabe ler também conta como falha
+        if game == "unknown":
+            failed += 1
+
+        if args.verbose:
+            for d in found:
+                print(f"    {d.game:10} {d.confidence:.2f}  {d.byte_order}-endian")
+
+    if failed:
+        sys.exit(1)
+
+
+def run_extract(args):
+    from core.batch import extract_file, input_root
+    from core.inputs import expand_inputs
+
+    paths = expand_inputs(args.input, (".lng",))
+    kwargs = {"fmt": args.format, "tags": args.tags, "root": input_root(paths)}
+
+    if not args.no_cache and not args.profile:
+        from core.cache import DEFAULT_CACHE_SIZE, ExtractCache, default_cache_dir
+
+        cache_dir = args.cache_dir or default_cache_dir()
+        cache_size = args.cache_size * 1024 * 1024 if args.cache_size is not None else DEFAULT_CACHE_SIZE
+        os.makedirs(cache_dir, exist_ok=True)
+        kwargs["cache"] = ExtractCache(cache_dir, cache_size)
+
+    run_files(args, extract_file, paths, kwargs)
+
+
+def run_rebuild(args):
+    from core.batch import input_root, rebuild_file
+    from core.inputs import REBUILD_INPUTS, expand_inputs
+
+    paths = expand_inputs(args.input, REBUILD_INPUTS)
+    kwargs = {"optimize_pool": args.optimize_pool, "tags": args.tags, "base": args.base,
+              "extend_glyphs": args.extend_glyphs, "root": input_root(paths)}
+
+    run_files(args, rebuild_file, paths, kwargs)
+
+
+def run_verify(args):
+    from core.inputs import expand_inputs
+    from core.verify import verify_file
+
+    paths = expand_inputs(args.input, (".lng",))
+    kwargs = {"fmt": args.format, "tags": args.tags}
+
+    run_files(args, verify_file, paths, kwargs)
+
+
+def run_watch(args):
+    from core.watch import Watcher
+
+    if not os.path.isdir(args.input):
+        print(f"[ERRO] not a directory: {args.input}")
+        sys.exit(1)
+
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+
+    Watcher(
+        args.input,
+        output_dir=args.output,
+        interval=args.interval,
+        debounce=args.debounce,
+        optimize_pool=args.optimize_pool,
+        tags=args.tags,
+        base=args.base,
+        extend_glyphs=args.extend_glyphs,
+    ).run()
+
+
+COMMANDS = {
+    "detect": run_detect,
+    "extract": run_extract,
+    "rebuild": run_rebuild,
+    "verify": run_verify,
+    "watch": run_watch,
+}
+
+
+def run_files(args, func, paths, kwargs):
+    from core import profile
+    from core.batch import run_batch
+
+    if not paths:
+        print("[ERRO] no input files found")
+        sys.exit(1)
+
+    single = len(paths) == 1
+    archive = None
+
+    if args.output and args.output.lower().endswith(".zip"):
+        # tudo num zip só, escrito aqui; os workers devolvem os arquivos
+        from core.archive import ZipWriter
+
+        archive = ZipWriter(args.output)
+        kwargs["archive"] = args.output
+
+    elif args.output:
+        if single:
+            kwargs["output"] = args.output
+        else:
+            os.makedirs(args.output, exist_ok=True)
+            kwargs["output_dir"] = args.output
+
+    if "root" in kwargs and ("output_dir" in kwargs or archive is not None):
+        # duas entradas com a mesma saída: erro antes de gravar qualquer coisa
+        from core.batch import find_collision
+
+        clash = find_collision(paths, kwargs["root"])
+        if clash:
+            if archive is not None:
+                archive.discard()
+            print(f"[ERRO] {clash[0]} and {clash[1]} would be written to the same file in {args.output}")
+            sys.exit(1)
+
+    if args.profile:
+        # as etapas são medidas neste processo (e sem cache)
+        args.jobs = 1
+        profile.enable(memory=args.profile_memory)
+
+    failed = 0
+
+    try:
+        for path, ok, result in run_batch(func, paths, args.jobs, **kwargs):
+            if ok and archive is not None:
+                result, files = result
+                try:
+                    archive.add_files(files)
+                except ValueError as e:
+                    ok, result = False, f"{type(e).__name__}: {e}"
+
+            if not ok:
+                failed += 1
+                print(f"[ERRO] {path}: {result}")
+                continue
+
+            for message in result:
+                print(message if message.startswith("[") else f"[OK] {message}")
+    except BaseException:
+        if archive is not None:
+            archive.discard()
+        raise
+
+    if archive is not None:
+        archive.close()
+
+    if not single:
+        print(f"\n{len(paths) - failed} ok, {failed} failed ({len(paths)} files)")
+
+    if args.profile:
+        import json
+
+        report = profile.report()
+        profile.disable()
+
+        with open(args.profile, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+        print()
+        for name, row in report["stages"].items():
+            rate = f"{row['entries_per_s']:>10} entries/s" if row["entries_per_s"] else " " * 20
+            peak = f"  peak {row['peak_bytes'] / 1e6:.1f} MB" if "peak_bytes" in row else ""
+            print(f"[PROFILE] {name:15} {row['seconds']:9.3f}s {rate}{peak}")
+        print(f"[PROFILE] report → {args.profile}")
+
+    if failed:
+        sys.exit(1)
+
 
 # ======================
 #          CLI
 # ======================
 def main():
-    import sys
-    import argparse
-
     parser = argparse.ArgumentParser(
         prog="lngtool",
         description="Obscure 1, Obscure 2 and Final Exam .lng tool"
@@ -22,16 +221,70 @@ def main():
     sub = parser.add_subparsers(dest="command")
 
     detect_cmd = sub.add_parser("detect")
-    detect_cmd.add_argument("input")
+    detect_cmd.add_argument("input", nargs="+", help=".lng files, directories or globs")
+    detect_cmd.add_argument("-v", "--verbose", action="store_true",
+                            help="list every matching format with its confidence and byte order")
 
     extract_cmd = sub.add_parser("extract")
-    extract_cmd.add_argument("input")
-    extract_cmd.add_argument("-o", "--output")
-    extract_cmd.add_argument("--format", choices=["txt", "csv", "both"], default="txt")
+    extract_cmd.add_argument("input", nargs="+", help=".lng files, directories or globs")
+    extract_cmd.add_argument("-o", "--output", help="output file (one input) or directory (batch)")
+    extract_cmd.add_argument("--format", choices=["txt", "csv", "both", "jsonl"], default="txt",
+                             help="both = TXT and CSV; jsonl = one JSON object per entry (for scripts)")
+    extract_cmd.add_argument("-j", "--jobs", type=int, default=0, help="worker processes (0 = all cores)")
+    extract_cmd.add_argument("--tags", choices=["ps2", "raw"], default="ps2",
+                             help="Obscure 1: button tag table ([L1], [X], ...); raw keeps the font glyphs")
+    extract_cmd.add_argument("--no-cache", action="store_true",
+                             help="always extract, without reading or filling the cache")
+    extract_cmd.add_argument("--cache-dir", help="cache directory (default: OBSCURE_LNG_CACHE or the user cache dir)")
+    extract_cmd.add_argument("--cache-size", type=int,
+                             help="cache size limit in MB; least recently used entries go first (default: 512)")
 
     rebuild_cmd = sub.add_parser("rebuild")
-    rebuild_cmd.add_argument("input")
-    rebuild_cmd.add_argument("-o", "--output")
+    rebuild_cmd.add_argument("input", nargs="+",
+                             help=".txt/.csv/.jsonl files, directories or globs (.txt wins over .csv, .csv over .jsonl)")
+    rebuild_cmd.add_argument("-o", "--output", help="output file (one input) or directory (batch)")
+    rebuild_cmd.add_argument("-j", "--jobs", type=int, default=0, help="worker processes (0 = all cores)")
+    rebuild_cmd.add_argument("--optimize-pool", action="store_true",
+                             help="Final Exam: share repeated strings and suffixes in the string pool")
+    rebuild_cmd.add_argument("--tags", choices=["ps2", "raw"],
+                             help="Obscure 1: button tag table (default: TXT header or ps2)")
+    rebuild_cmd.add_argument("--base", metavar="ORIGINAL",
+                             help="original .lng (or a directory of them, batch): copy unchanged entries "
+                                  "byte for byte and re-encode only the edited ones")
+
+    verify_cmd = sub.add_parser("verify")
+    verify_cmd.add_argument("input", nargs="+", help=".lng files, directories or globs")
+    verify_cmd.add_argument("--format", choices=["txt", "csv", "jsonl", "both", "all"], default="all",
+                            help="round trip through one format, both (TXT and CSV) or all")
+    verify_cmd.add_argument("-j", "--jobs", type=int, default=0, help="worker processes (0 = all cores)")
+    verify_cmd.add_argument("--tags", choices=["ps2", "raw"], default="ps2",
+                            help="Obscure 1: button tag table used in the round trip")
+    verify_cmd.set_defaults(output=None)
+
+    watch_cmd = sub.add_parser("watch")
+    watch_cmd.add_argument("input", help="directory with the .txt/.csv/.jsonl files (.txt wins over .csv, .csv over .jsonl)")
+    watch_cmd.add_argument("-o", "--output", help="output directory (default: next to each file)")
+    watch_cmd.add_argument("--interval", type=float, default=0.5, help="seconds between directory scans")
+    watch_cmd.add_argument("--debounce", type=float, default=0.5,
+                           help="seconds a file must stay unchanged before it is rebuilt")
+    watch_cmd.add_argument("--optimize-pool", action="store_true",
+                           help="Final Exam: share repeated strings and suffixes in the string pool")
+    watch_cmd.add_argument("--tags", choices=["ps2", "raw"],
+                           help="Obscure 1: button tag table (default: TXT header or ps2)")
+    watch_cmd.add_argument("--base", metavar="ORIGINAL",
+                           help="original .lng or directory of them, used until a .new.lng exists")
+
+    for cmd in (rebuild_cmd, watch_cmd):
+        cmd.add_argument("--extend-glyphs", action="store_true",
+                         help="Final Exam: append characters missing from the glyph table to it "
+                              "(without it they are only reported)")
+
+    for cmd in (extract_cmd, rebuild_cmd, verify_cmd):
+        cmd.add_argument("--profile", metavar="JSON",
+                         help="time each stage (read, parse-table, decode-strings, ...) and write the report "
+                              "to JSON; runs with one job")
+        cmd.add_argument("--profile-memory", action="store_true",
+                         help="with --profile, also record the tracemalloc peak of each stage (slower)")
 
     # ======================
     # DRAG & DROP SUPPORT
@@ -47,7 +300,8 @@ def main():
             print("[1] TXT")
             print("[2] CSV")
             print("[3] BOTH")
-            print("Or type: txt / csv / both\n")
+            print("[4] JSONL")
+            print("Or type: txt / csv / both / jsonl\n")
 
             choice = input("Option: ").strip().lower()
 
@@ -57,25 +311,41 @@ def main():
                 fmt = "csv"
             elif choice in ["3", "both"]:
                 fmt = "both"
+            elif choice in ["4", "jsonl"]:
+                fmt = "jsonl"
             else:
                 print("[ERRO] invalid option")
                 sys.exit(1)
 
             args = argparse.Namespace(
                 command="extract",
-                input=file_path,
+                input=[file_path],
                 output=None,
-                format=fmt
+                format=fmt,
+                jobs=1,
+                tags="ps2",
+                no_cache=False,
+                cache_dir=None,
+                cache_size=None,
+                profile=None,
+                profile_memory=False
             )
 
         # ======================
         # REBUILD (.txt / .csv)
         # ======================
-        elif file_path.endswith((".txt", ".csv")):
+        elif file_path.endswith((".txt", ".csv", ".jsonl")):
             args = argparse.Namespace(
                 command="rebuild",
-                input=file_path,
-                output=None
+                input=[file_path],
+                output=None,
+                jobs=1,
+                optimize_pool=False,
+                tags=None,
+                base=None,
+                extend_glyphs=False,
+                profile=None,
+                profile_memory=False
             )
 
         else:
@@ -84,86 +354,19 @@ def main():
     else:
         args = parser.parse_args()
 
-    # ======================
-    # DETECT
-    # ======================
-    if args.command == "detect":
-        print(detect_game(args.input))
-        return
-
-    # ======================
-    # EXTRACT
-    # ======================
-    if args.command == "extract":
-        game = detect_game(args.input)
-        data = None
-
-        if game == "finalexam":
-            data = extract_final_exam(args.input)
-
-        elif game == "ob1":
-            data = extract_ob1(args.input)
-
-        elif game == "ob2":
-            data = extract_ob2(args.input)   # <<<<<< FALTAVA ISSO
-
-        else:
-            print(f"[ERRO] Detect failed. Game = {game}")
-            return
-
-        base = args.input.rsplit(".", 1)[0]
-
-        if args.format in ["txt", "both"]:
-            txt_out = args.output or base + ".txt"
-            export_txt(data, txt_out)
-            print(f"[OK] TXT → {txt_out}")
-
-        if args.format in ["csv", "both"]:
-            csv_out = base + ".csv"
-            export_csv(data, csv_out)
-            print(f"[OK] CSV → {csv_out}")
+    command = COMMANDS.get(args.command)
 
+    if command is None:
+        parser.print_help()
         return
 
-    # ======================
-    # REBUILD
-    # ======================
-    if args.command == "rebuild":
-
-        base = args.input.rsplit(".", 1)[0]
-
-        if args.input.endswith(".txt"):
-            with open(args.input, encoding="utf-8") as f:
-                data = parse_txt(f.read())
-
-        elif args.input.endswith(".csv"):
-            data = parse_csv(args.input)
-
-        else:
-            print("[ERRO] formato desconhecido")
-            return
-
-        header = data.get("header", {})
-        entries = data.get("entries", [])
-        game = data.get("game", "").lower()
-
-        output = args.output or base + ".new.lng"
-
-        if game in ["ob1", "obscure1"]:
-            rebuild_ob1(header, entries, output)
-            print(f"[OK] OB1 rebuild → {output}")
-
-        elif game in ["finalexam", "final_exam"]:
-            rebuild_final_exam(header, entries, output)
-            print(f"[OK] FINAL EXAM rebuild → {output}")
-
-        elif game in ["ob2", "obscure2"]:
-            rebuild_ob2(header, entries, output)
-            print(f"[OK] OB2 rebuild → {output}")
-
-        else:
-            print(f"[ERRO] jogo desconhecido: {game}")
+    command(args)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if getattr(sys, "frozen", False):
+        # executável congelado (PyInstaller): os workers do batch passam por aqui
+        import multiprocessing
+        multiprocessing.freeze_support()
+
+    main()
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from bench.corpus import GENERATORS
+from core.archive import ZipWriter
+from core.batch import extract_file
+
+
+def _corpus(tmp_path, game, entries=2000):
+    path = str(tmp_path / f"{game}.lng")
+    GENERATORS[game](path, entries, dup=0.1, seed=1)
+    return path
+
+
+@pytest.mark.parametrize("game", ["ob1", "ob2"])
+def test_failed_extract_keeps_previous_output(tmp_path, game):
+    path = _corpus(tmp_path, game)
+    extract_file(path, fmt="both")
+    before = {ext: (tmp_path / f"{game}{ext}").read_bytes() for ext in (".txt", ".csv")}
+
+    # .lng cortado: o erro vem no meio das entradas, com parte já exportada
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:len(data) * 3 // 4])
+
+    with pytest.raises(Exception):
+        extract_file(path, fmt="both")
+
+    for ext, content in before.items():
+        assert (tmp_path / f"{game}{ext}").read_bytes() == content
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_zip_duplicate_adds_nothing(tmp_path):
+    with ZipWriter(str(tmp_path / "out.zip")) as archive:
+        archive.add("a.txt", b"a")
+
+        # a.csv não pode entrar sozinho quando a.txt do mesmo fonte falha
+        with pytest.raises(ValueError):
+            archive.add_files([("a.csv", b"a"), ("a.txt", b"b")])
+        assert archive.names == {"a.txt"}
+
+        archive.add_files([("a.csv", b"a")])
@@ -0,0 +1,26 @@
+import os
+
+from bench.corpus import GENERATORS
+from core.batch import extract_file
+from core.cache import ExtractCache
+
+
+def test_cached_extract_matches(tmp_path):
+    path = str(tmp_path / "a.lng")
+    GENERATORS["ob2"](path, 300, seed=1)
+    cache = ExtractCache(str(tmp_path / "cache"))
+    outputs = [str(tmp_path / f"a.{ext}") for ext in ("txt", "csv")]
+
+    first = extract_file(path, fmt="both", cache=cache)
+    before = [open(p, "rb").read() for p in outputs]
+    for p in outputs:
+        os.remove(p)
+
+    second = extract_file(path, fmt="both", cache=cache)
+    assert not any("(cached)" in m for m in first)
+    assert any("(cached)" in m for m in second)
+    assert [open(p, "rb").read() for p in outputs] == before
+
+    # outro conteúdo, outra chave
+    GENERATORS["ob2"](path, 300, seed=2)
+    assert not any("(cached)" in m for m in extract_file(path, fmt="both", cache=cache))
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from bench.corpus import GENERATORS
+from core.detect import best_game, sniff
+
+TOOL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "obscure_lng_tool.py")
+
+
+def _detect(*paths):
+    return subprocess.run([sys.executable, TOOL, "detect", *paths], capture_output=True, text=True)
+
+
+def test_detect_exit_code(tmp_path):
+    good = str(tmp_path / "a.lng")
+    GENERATORS["ob1"](good, 50, seed=1)
+    junk = tmp_path / "junk.lng"
+    junk.write_bytes(b"not a language file")
+
+    assert _detect(good).returncode == 0
+    assert _detect(good, str(junk)).returncode == 1
+    assert _detect(good, str(tmp_path / "missing.lng")).returncode == 1
+
+
+@pytest.mark.parametrize("game", ["ob1", "ob2"])
+def test_small_table_with_trailing_bytes(tmp_path, game):
+    # tabela percorrida inteira (<= SNIFF_RECORDS) e padding depois dela
+    path = str(tmp_path / f"{game}.lng")
+    GENERATORS[game](path, 10, seed=1)
+
+    assert sniff(path)[0].confidence == 1.0
+
+    with open(path, "ab") as f:
+        f.write(bytes(16))
+
+    found = [d for d in sniff(path) if d.game == game]
+    assert found and 0 < found[0].confidence < 1.0
+    assert best_game(sniff(path)) == game
@@ -0,0 +1,45 @@
+import os
+import zipfile
+
+from core.batch import find_collision, input_root
+from core.inputs import REBUILD_INPUTS, expand_inputs
+
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("x")
+
+
+def test_directory_prefers_txt_over_csv(tmp_path):
+    for name in ("a.txt", "a.csv", "b.csv", "b.jsonl", "sub/c.jsonl", "a.new.lng"):
+        _touch(str(tmp_path / name))
+
+    found = [os.path.relpath(p, tmp_path).replace(os.sep, "/") for p in expand_inputs([str(tmp_path)], REBUILD_INPUTS)]
+    assert found == ["a.txt", "b.csv", "sub/c.jsonl"]
+
+
+def test_zip_members(tmp_path):
+    bundle = str(tmp_path / "bundle.zip")
+    with zipfile.ZipFile(bundle, "w") as zf:
+        zf.writestr("pc/a.lng", b"")
+        zf.writestr("pc/readme.md", b"")
+
+    assert expand_inputs([bundle], (".lng",)) == [f"{bundle}/pc/a.lng"]
+
+
+def test_collisions(tmp_path):
+    a = str(tmp_path / "a.lng")
+    sub = str(tmp_path / "sub" / "a.lng")
+    for path in (a, sub):
+        _touch(path)
+
+    # mesmo nome em pastas diferentes: saídas diferentes
+    assert find_collision([a, sub], input_root([a, sub])) is None
+
+    bundle = str(tmp_path / "bundle.zip")
+    with zipfile.ZipFile(bundle, "w") as zf:
+        zf.writestr("a.lng", b"")
+
+    member = f"{bundle}/a.lng"
+    assert find_collision([a, member], input_root([a, member])) == (a, member)
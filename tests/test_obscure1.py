@@ -0,0 +1,24 @@
+import pytest
+
+from core.entries import Ob1Entry
+from games.obscure1 import OB1_TAG_TABLES, extract_ob1, get_ob1_tag_codec, rebuild_ob1_bytes
+
+
+def test_l2_is_cp1252_byte():
+    data = rebuild_ob1_bytes({"tags": "ps2"}, [Ob1Entry(0, 0, 0, 0, 0, "[L2] + [L3]")])
+
+    assert b"\xd7 + \xca" in data
+    assert extract_ob1(bytes(data))["entries"][0].text == "[L2] + [L3]"
+
+
+@pytest.mark.parametrize("table", list(OB1_TAG_TABLES))
+def test_tags_round_trip(table):
+    apply, reverse = get_ob1_tag_codec(table)
+    tags = " ".join(tag for _, tag in OB1_TAG_TABLES[table])
+
+    assert apply(reverse(tags)) == tags
+
+
+def test_unknown_table():
+    with pytest.raises(ValueError):
+        get_ob1_tag_codec("xbox")
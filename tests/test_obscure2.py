@@ -0,0 +1,32 @@
+import random
+
+import pytest
+
+from core.entries import Ob2Entry
+from games import obscure2
+from games.obscure2 import decode_texts, extract_ob2, rebuild_ob2_bytes, smart_decode
+
+# pedaços que levam um texto para cada codec (e o "�" já escrito em UTF-8)
+PIECES = [b"abc", "é".encode(), "é".encode("cp1252"), "漢".encode(), b"\xef\xbf\xbd", b"\xff", b"x\x00y"]
+
+
+def test_decode_texts_matches_smart_decode():
+    r = random.Random(1)
+
+    for _ in range(2000):
+        raws = [b"".join(r.choice(PIECES) for _ in range(r.randrange(4))) for _ in range(r.randrange(6))]
+        assert decode_texts(raws)[1] == [smart_decode(raw) for raw in raws]
+
+
+@pytest.mark.parametrize("texts", [["a", "b"], ["a", "é"], ["é", "漢"]])
+def test_mixed_file_round_trip(monkeypatch, texts):
+    # blocos de 2 entradas: um bloco ASCII, um UTF-8 e um cp1252 no mesmo arquivo
+    monkeypatch.setattr(obscure2, "DECODE_CHUNK", 2)
+    entries = [Ob2Entry(0, 7, i, i, text, None) for i, text in enumerate(texts)]
+    entries.append(Ob2Entry(0, 7, 2, 2, "ç", "cp1252"))
+    entries.append(Ob2Entry(0, 7, 3, 3, "ã", "cp1252"))
+
+    data = extract_ob2(rebuild_ob2_bytes({"languageCode": 0, "encoding": "utf-8"}, entries))
+
+    assert [e.text for e in data["entries"]] == texts + ["ç", "ã"]
+    assert data["fallback"] == ([(0, 2), (0, 3)] if data["encoding"] == "mixed" else [])
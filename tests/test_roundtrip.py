@@ -0,0 +1,63 @@
+import pytest
+
+from bench.corpus import GENERATORS
+from core import api
+from core.batch import extract_file, rebuild_file
+from core.verify import verify_file
+
+GAMES = list(GENERATORS)
+
+
+def _corpus(tmp_path, game, entries=300, dup=0.1, seed=1):
+    path = str(tmp_path / f"{game}.lng")
+    GENERATORS[game](path, entries, dup=dup, seed=seed)
+    return path
+
+
+def _texts(data):
+    return [e.subs if data["game"] == "finalexam" else e.text for e in data["entries"]]
+
+
+@pytest.mark.parametrize("fmt", ["txt", "csv", "jsonl"])
+@pytest.mark.parametrize("dup", [0.0, 0.5])
+@pytest.mark.parametrize("game", GAMES)
+def test_verify_round_trip(tmp_path, game, dup, fmt):
+    # extract -> formato -> parse -> rebuild igual ao original byte a byte
+    verify_file(_corpus(tmp_path, game, dup=dup), fmt)
+
+
+@pytest.mark.parametrize("fmt", ["txt", "csv", "jsonl"])
+@pytest.mark.parametrize("game", GAMES)
+def test_extract_rebuild_files(tmp_path, game, fmt):
+    path = _corpus(tmp_path, game)
+    extract_file(path, fmt=fmt)
+    rebuild_file(str(tmp_path / f"{game}.{fmt}"))
+
+    original = api.extract(path)
+    rebuilt = api.extract(str(tmp_path / f"{game}.new.lng"))
+    assert _texts(rebuilt) == _texts(original)
+
+
+@pytest.mark.parametrize("game", GAMES)
+def test_patch_reencodes_only_edited_entries(tmp_path, game):
+    path = _corpus(tmp_path, game)
+    with open(path, "rb") as f:
+        original = f.read()
+
+    data = api.extract(path)
+
+    # sem edição o patch devolve o original
+    stats = {}
+    assert bytes(api.rebuild(data, base=path, stats=stats)) == original
+    assert stats["changed"] == 0
+
+    e = data["entries"][5]
+    if game == "finalexam":
+        e.subs[0] = (e.subs[0][0], "editado")
+    else:
+        e.text = "editado"
+
+    stats = {}
+    patched = api.extract(bytes(api.rebuild(data, base=path, stats=stats)))
+    assert stats["changed"] == 1
+    assert _texts(patched) == _texts(data)
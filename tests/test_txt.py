@@ -0,0 +1,87 @@
+import io
+import random
+
+import pytest
+
+from core import txt
+from core.csv import csv_entry_writer, read_csv
+from core.entries import Ob1Entry, Ob2Entry
+from core.txt import read_txt, txt_entry_writer
+
+# textos que já quebraram o parse do TXT (marca de entrada no texto)
+MARKER_TEXTS = [
+    "### ENTRY",
+    " ### ENTRY ",
+    "### ENTRY### ENTRY",
+    "### ENTRY ### ENTRY",
+    "a\n### ENTRY\nb",
+    "\\### ENTRY",
+    "###",
+    "",
+    "a\\#b",
+]
+
+FRAGMENTS = ["### ENTRY", "###", "#", " ", "\t", "\n", "\r", "\\", "a", "é", "[L1]"]
+
+
+def _entries(game, texts):
+    if game == "ob1":
+        return [Ob1Entry(i, 0, i, 0, 0, text) for i, text in enumerate(texts)]
+    return [Ob2Entry(0, 0, i, 0, text) for i, text in enumerate(texts)]
+
+
+def _round_trip(game, texts, fmt="txt"):
+    newline = "" if fmt == "csv" else "\n"
+    write, read = (csv_entry_writer, read_csv) if fmt == "csv" else (txt_entry_writer, read_txt)
+
+    out = io.StringIO(newline=newline)
+    write_entry = write(out, {"game": game, "languageCode": 0})
+    for e in _entries(game, texts):
+        write_entry(e)
+
+    data = read(io.StringIO(out.getvalue(), newline=newline or None))
+    return [e.text for e in data["entries"]]
+
+
+@pytest.mark.parametrize("fmt", ["txt", "csv"])
+@pytest.mark.parametrize("game", ["ob1", "ob2"])
+def test_marker_texts_round_trip(game, fmt):
+    assert _round_trip(game, MARKER_TEXTS, fmt) == MARKER_TEXTS
+
+
+@pytest.mark.parametrize("chunk", [7, 64, txt.CHUNK_SIZE])
+def test_random_texts_round_trip(monkeypatch, chunk):
+    # pedaços pequenos: a marca cai na divisa entre dois reads
+    monkeypatch.setattr(txt, "CHUNK_SIZE", chunk)
+    r = random.Random(chunk)
+
+    for _ in range(300):
+        texts = ["".join(r.choice(FRAGMENTS) for _ in range(r.randrange(8))) for _ in range(5)]
+        # o TXT não guarda espaços/quebras no fim do último texto de uma linha em branco
+        texts = [t.replace("\r", "") for t in texts]
+        assert _round_trip("ob2", texts) == texts
+
+
+def test_csv_column_names_first():
+    out = io.StringIO(newline="")
+    csv_entry_writer(out, {"game": "ob2", "languageCode": 3, "encoding": "utf-8"})(Ob2Entry(0, 0, 0, 0, "a"))
+    rows = out.getvalue().splitlines()
+
+    assert rows[0].startswith("group_index,")
+    assert rows[1].startswith("### LANGUAGE,")
+
+
+@pytest.mark.parametrize("lines", [
+    # CSV da versão anterior: a linha "### LANGUAGE" antes dos nomes das colunas
+    ["### LANGUAGE,game = ob2,languageCode = 3", "group_index,group_id,entry_index,meta,encoding,original,translated",
+     "0,0,0,0,,a,"],
+    # planilha reordenada: a linha foi para o fim
+    ["group_index,group_id,entry_index,meta,encoding,original,translated", "0,0,0,0,,a,",
+     "### LANGUAGE,game = ob2,languageCode = 3"],
+])
+def test_csv_header_row_position(lines):
+    data = read_csv(io.StringIO("\r\n".join(lines), newline=""))
+
+    assert [e.text for e in data["entries"]] == ["a"]
+    if lines[0].startswith("###"):
+        assert data["header"] == {"game": "ob2", "languageCode": "3"}
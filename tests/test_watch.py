@@ -0,0 +1,32 @@
+from bench.corpus import GENERATORS
+from core import api
+from core.batch import extract_file
+from core.watch import Watcher
+
+
+def _build_ready(watcher):
+    for path, sig in watcher.poll():
+        watcher.build(path, sig)
+
+
+def test_watch_rebuilds_edited_source(tmp_path):
+    lng = str(tmp_path / "a.lng")
+    GENERATORS["ob1"](lng, 200, dup=0.0, seed=1)
+    extract_file(lng)
+
+    txt = tmp_path / "a.txt"
+    output = str(tmp_path / "a.new.lng")
+    watcher = Watcher(str(tmp_path), debounce=0)
+
+    watcher.start()
+    _build_ready(watcher)
+    with open(lng, "rb") as f, open(output, "rb") as g:
+        assert f.read() == g.read()
+
+    # a segunda build usa o .new.lng anterior como base (patch)
+    text = api.extract(lng)["entries"][3].text
+    source = txt.read_text(encoding="utf-8")
+    txt.write_text(source.replace(text, text + " editado", 1), encoding="utf-8")
+
+    _build_ready(watcher)
+    assert api.extract(output)["entries"][3].text == text + " editado"